@@ -4,6 +4,71 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Engine async untuk request path. Kosong = diturunkan dari DATABASE_URL
+# (postgresql -> postgresql+asyncpg, sqlite -> sqlite+aiosqlite)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+
+# Connection pool (engine sync & async; diabaikan kalau dialect tidak pakai QueuePool, mis. SQLite :memory:)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 20))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
\ No newline at end of file
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", 50000))
+# Write-behind PredictionLog
+LOG_QUEUE_MAX = int(os.getenv("LOG_QUEUE_MAX", 10000))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", 500))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", 1.0))
+# Rollup harian prediction_logs + retention raw log (detik / hari, 0 = nonaktif)
+LOG_ROLLUP_INTERVAL = float(os.getenv("LOG_ROLLUP_INTERVAL", 3600))
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", 30))
+
+# Drift monitor fitur input /recommend/user: bucket waktu (detik) x jumlah bucket = horizon terpanjang
+DRIFT_BUCKET_SECONDS = int(os.getenv("DRIFT_BUCKET_SECONDS", 60))
+DRIFT_BUCKETS = int(os.getenv("DRIFT_BUCKETS", 60))
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", 200))
+# Window default yang dilaporkan GET /models/drift (detik)
+DRIFT_WINDOWS = os.getenv("DRIFT_WINDOWS", "300,3600")
+
+# Structured logging app (JSON lines via QueueHandler + listener thread)
+# {pid} diganti pid worker: tiap worker uvicorn punya file + jadwal rotasi sendiri. Path tanpa
+# {pid} cuma aman untuk satu worker (rotasi antar proses saling timpa backup); kosong = tanpa file
+APP_LOG_FILE = os.getenv("APP_LOG_FILE", "logs/system.{pid}.log")
+APP_LOG_LEVEL = os.getenv("APP_LOG_LEVEL", "INFO").upper()
+APP_LOG_MAX_BYTES = int(os.getenv("APP_LOG_MAX_BYTES", 50 * 1024 * 1024))
+APP_LOG_BACKUP_COUNT = int(os.getenv("APP_LOG_BACKUP_COUNT", 10))
+APP_LOG_ROTATE_SECONDS = int(os.getenv("APP_LOG_ROTATE_SECONDS", 86400))
+APP_LOG_QUEUE_MAX = int(os.getenv("APP_LOG_QUEUE_MAX", 100000))
+# Sampling log sukses per endpoint, mis. "recommend_user=0.1" (default: semua ditulis)
+APP_LOG_SAMPLE_RATES = os.getenv("APP_LOG_SAMPLE_RATES", "")
+APP_LOG_CONSOLE = os.getenv("APP_LOG_CONSOLE", "true").lower() in ("1", "true", "yes")
+# Level per logger, mis. "app.database=WARNING,app.predictions=INFO". Default: logger pool
+# SQLAlchemy (dinamai dari class pool di app.database) tidak ikut menulis INFO dispose/recreate
+APP_LOG_LEVELS = os.getenv("APP_LOG_LEVELS", "app.database=WARNING")
+
+# Token -> principal cache untuk get_current_user
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 10000))
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 300))
+
+# Process pool khusus bcrypt (0 = hashing inline di threadpool seperti dulu)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_CONCURRENCY = int(os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", 4))
+PASSWORD_HASH_MAX_WAITING = int(os.getenv("PASSWORD_HASH_MAX_WAITING", 256))
+
+# Artefak model (joblib + metrics). Default: app/ml relatif ke package, jalan di Docker maupun lokal
+ML_DIR = os.getenv("ML_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "ml"))
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", 5))
+
+# Snapshot katalog produk in-memory (detik, 0 = hanya refresh manual)
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", 300))
+
+# Retrieval top-K per user
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", 6))
+RECOMMEND_MAX_K = int(os.getenv("RECOMMEND_MAX_K", 100))
+
+# Cache response /recommend/user untuk profil di grid bucket (0 = nonaktif)
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", 4096))
+PROFILE_CACHE_BUCKETS = os.getenv("PROFILE_CACHE_BUCKETS", "")
@@ -1,10 +1,62 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
-from .config import DATABASE_URL
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from .config import DATABASE_URL, ASYNC_DATABASE_URL
+from .config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+from .services.metrics import STAGE_LATENCY
 
-engine = create_engine(DATABASE_URL)
+# Pool yang mencatat lama menunggu koneksi (stage "db_pool_wait" di /metrics)
+class _TimedGet:
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - start, stage="db_pool_wait")
+
+class TimedQueuePool(_TimedGet, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedGet, AsyncAdaptedQueuePool):
+    pass
+
+# Driver async untuk URL sync yang sama
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+def _engine_kwargs(url, is_async=False):
+    url = make_url(url)
+    pool_class = url.get_dialect(_is_async=is_async).get_pool_class(url)
+    if pool_class not in (QueuePool, AsyncAdaptedQueuePool):
+        return {}
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        # SQLite file lokal tidak punya koneksi jaringan yang bisa basi; ping cuma nambah round trip
+        "pool_pre_ping": DB_POOL_PRE_PING and url.get_backend_name() != "sqlite"
+    }
+
+# Engine sync: script offline, create_all, dan thread background (catalog refresh)
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine async: request path (auth, products, /recommend/me, prediction log)
+ASYNC_URL = make_url(ASYNC_DATABASE_URL) if ASYNC_DATABASE_URL else async_url(DATABASE_URL)
+async_engine = create_async_engine(ASYNC_URL, **_engine_kwargs(ASYNC_URL, is_async=True))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -12,4 +64,45 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def pool_stats(bind):
+    pool = bind.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(0, pool.overflow()),
+        "idle": pool.checkedin()
+    }
+
+# create_all tidak mengubah tabel yang sudah ada: tambahkan kolom nullable baru
+# dari model ke database lama (tanpa migration tool)
+def add_missing_columns(bind=engine):
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}")
+
+# Sama seperti kolom: index baru di model dibuat untuk tabel yang sudah ada
+def add_missing_indexes(bind=engine):
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind)
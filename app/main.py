@@ -1,15 +1,105 @@
+import time
+_IMPORT_START = time.perf_counter()
+
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import cluster, recommend, product, auth
-from app.database import Base, engine
+from app.routers import cluster, recommend, product, auth, user, models, metrics, analytics
+from app.database import Base, engine, async_engine, add_missing_columns, add_missing_indexes
+from app.services.log_writer import prediction_log_writer
+from app.security import password_hash_pool
+from app.services.model_store import model_store
+from app.services.catalog import catalog
+from app.services.log_rollup import log_rollup
+from app.services.worker_lock import WorkerLock
+from app.services.metrics import MetricsMiddleware, registry
+from app.services.logging_pipeline import logging_pipeline
+from app.services.recommendations import score_profile
+from app.config import RECOMMEND_TOP_K
+
+logger = logging.getLogger(__name__)
+
+# Profil tipikal untuk warmup (urutan RAW_COLS)
+WARMUP_PROFILE = (14, 10, 500, 2.5, 5, 5, 12, 40)
+
+# Durasi tiap fase boot (detik), diekspor di /metrics sebagai app_boot_seconds_*
+boot_times = {}
+registry.register_stats("app_boot_seconds", lambda: boot_times, help_text="Boot phase duration")
+
+
+def _timed(phase, fn):
+    start = time.perf_counter()
+    try:
+        return fn()
+    except Exception:
+        logger.exception("Startup phase failed", extra={"phase": phase})
+    finally:
+        boot_times[phase] = round(time.perf_counter() - start, 4)
+
+
+# DDL antar worker diserialkan: worker pertama membuat tabel/kolom/index, sisanya
+# menunggu lalu cuma menemukan semuanya sudah ada (no-op)
+def _init_schema():
+    with WorkerLock("schema").hold():
+        Base.metadata.create_all(bind=engine)
+        add_missing_columns(engine)
+        add_missing_indexes(engine)
+
+
+# Panaskan jalur request pertama: scoring + top-K, snapshot katalog, metrics JSON
+def _warmup():
+    bundle = model_store.current()
+    if bundle is not None:
+        score_profile(bundle, WARMUP_PROFILE, RECOMMEND_TOP_K)
+    try:
+        catalog.refresh()
+    except Exception as e:
+        logger.warning("Warmup catalog failed: %s", e)
+    try:
+        cluster.metrics_cache.get()
+    except Exception as e:
+        logger.warning("Warmup metrics failed: %s", e)
+
+
+# Startup/shutdown sekali per worker. Import app.main tidak menyentuh DB maupun artefak,
+# jadi gagal konek DB tidak bikin import (dan --reload) ikut gagal.
+@asynccontextmanager
+async def lifespan(app):
+    startup_start = time.perf_counter()
+    boot_times["import"] = round(startup_start - _IMPORT_START, 4)
+    logging_pipeline.start()
+    # DB tidak bisa dihubungi: endpoint yang tidak butuh DB tetap jalan
+    _timed("schema", _init_schema)
+    _timed("models", model_store.reload)
+    model_store.start_watching()
+    prediction_log_writer.start()
+    catalog.start()
+    log_rollup.start()
+    _timed("warmup", _warmup)
+    boot_times["startup"] = round(time.perf_counter() - startup_start, 4)
+    boot_times["total"] = round(time.perf_counter() - _IMPORT_START, 4)
+    logger.info("Boot complete", extra={"boot_seconds": dict(boot_times)})
+
+    yield
+
+    model_store.stop_watching()
+    catalog.stop()
+    log_rollup.stop()
+    # Flush sisa PredictionLog di queue sebelum proses mati
+    await prediction_log_writer.stop()
+    password_hash_pool.shutdown()
+    await async_engine.dispose()
+    # Terakhir: tulis semua record log yang masih di queue
+    logging_pipeline.stop()
 
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="E-commerce Recommender API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -18,14 +108,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Model-Version", "X-Recommendation-Source", "ETag", "X-Next-Cursor"],
 )
+app.add_middleware(MetricsMiddleware)
 
 templates = Jinja2Templates(directory="templates")
 
 app.include_router(auth.router)
 app.include_router(cluster.router)
+app.include_router(user.router)
 app.include_router(recommend.router)
 app.include_router(product.router)
+app.include_router(models.router)
+app.include_router(metrics.router)
+app.include_router(analytics.router)
 
 @app.get("/", response_class=HTMLResponse)
 def read_root(request: Request):
@@ -1,12 +1,25 @@
-from sqlalchemy import Column, Integer, JSON, DateTime
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Daftar product_id: integer[] di PostgreSQL, JSON list di dialect lain (SQLite)
+ProductIdArray = JSON().with_variant(ARRAY(Integer), "postgresql")
+
 class PredictionLog(Base):
     __tablename__ = "prediction_logs"
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer)
     predicted_cluster = Column(Integer)
+    # Format lama: list dict produk lengkap per request. Tidak ditulis lagi, hanya untuk row lama
     recommended_items = Column(JSON)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    # Format compact: cukup id produk + versi model (detail produk ada di katalog/artefak)
+    product_ids = Column(ProductIdArray)
+    model_version = Column(String(12))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_prediction_logs_user_created", "user_id", "created_at"),
+        Index("ix_prediction_logs_created", "created_at"),
+    )
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, BigInteger, JSON, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Hasil /recommend/user yang sudah dihitung per user (default k, tanpa filter).
+# Valid selama model_version & features_hash masih sama dengan user + model aktif.
+class UserRecommendation(Base):
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), primary_key=True)
+    cluster_id = Column(Integer)
+    model_version = Column(String(12))
+    features_hash = Column(BigInteger)
+    payload = Column(JSON)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Date
+from app.database import Base
+
+# Agregat harian dari prediction_logs (diisi app/services/log_rollup.py).
+# Endpoint analytics hanya baca dari sini, raw log boleh di-prune.
+class ClusterDailyRollup(Base):
+    __tablename__ = "prediction_cluster_daily"
+
+    day = Column(Date, primary_key=True)
+    # "" untuk row log lama yang belum punya model_version
+    model_version = Column(String(12), primary_key=True)
+    cluster_id = Column(Integer, primary_key=True)
+    predictions = Column(Integer, nullable=False)
+    users = Column(Integer, nullable=False)
+
+
+class ProductDailyRollup(Base):
+    __tablename__ = "prediction_product_daily"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    impressions = Column(Integer, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Integer, String, Float, BigInteger
 from app.database import Base
 
 class User(Base):
@@ -20,4 +20,7 @@ class User(Base):
     wishlist_count = Column(Integer, default=0)
     add_to_cart_count = Column(Integer, default=0)
     page_views = Column(Integer, default=0)
-    cluster_id = Column(Integer, nullable=True)
\ No newline at end of file
+    cluster_id = Column(Integer, nullable=True)
+    # Diisi job re-segmentasi: versi model & hash fitur saat cluster_id terakhir dihitung
+    cluster_model_version = Column(String(12), nullable=True)
+    features_hash = Column(BigInteger, nullable=True)
\ No newline at end of file
@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models.rollup import ClusterDailyRollup, ProductDailyRollup
+from app.routers.auth import get_current_user
+from app.services.log_rollup import log_rollup
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+MAX_RANGE_DAYS = 366
+
+# Semua endpoint di sini hanya baca tabel rollup harian, tidak pernah scan prediction_logs
+def _date_range(start: Optional[date], end: Optional[date]):
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range too large (max {MAX_RANGE_DAYS} days)")
+    return start, end
+
+@router.get("/clusters")
+async def cluster_daily(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    model_version: Optional[str] = None,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    start, end = _date_range(start, end)
+    t = ClusterDailyRollup.__table__
+    query = select(t).where(t.c.day >= start, t.c.day <= end).order_by(t.c.day, t.c.model_version, t.c.cluster_id)
+    if model_version is not None:
+        query = query.where(t.c.model_version == model_version)
+    rows = (await db.execute(query)).mappings().all()
+    return {"start": start, "end": end, "rows": [dict(r) for r in rows]}
+
+@router.get("/products")
+async def top_products(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    limit: int = 20,
+    current_user=Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    start, end = _date_range(start, end)
+    limit = max(1, min(limit, 1000))
+    t = ProductDailyRollup.__table__
+    total = func.sum(t.c.impressions).label("impressions")
+    rows = (await db.execute(
+        select(t.c.product_id, total)
+        .where(t.c.day >= start, t.c.day <= end)
+        .group_by(t.c.product_id)
+        .order_by(total.desc(), t.c.product_id)
+        .limit(limit)
+    )).all()
+    return {
+        "start": start,
+        "end": end,
+        "products": [{"product_id": pid, "impressions": int(n)} for pid, n in rows]
+    }
+
+@router.get("/rollup/stats")
+def rollup_stats():
+    return log_rollup.stats()
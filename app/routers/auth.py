@@ -1,32 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.user import UserCreate, Token, UserLogin
-from app.security import get_password_hash, verify_password, create_access_token
+from app.security import get_password_hash_async, verify_password_async, create_access_token, password_hash_pool, PasswordHashBusy
+from app.services.auth_cache import token_cache, UserPrincipal
+from app.services.metrics import stage
 from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
 from datetime import timedelta
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+async def _find_user(db: AsyncSession, email: str):
+    return (await db.execute(select(User).where(User.email == email))).scalars().first()
+
+async def _insert_user(db: AsyncSession, new_user: User):
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    return new_user
+
+# Hashing jalan di process pool khusus (lihat PasswordHashPool), query DB lewat engine async
+async def _hash_or_503(coro):
+    try:
+        return await coro
+    except PasswordHashBusy:
+        raise HTTPException(status_code=503, detail="Authentication service busy, please retry")
+
 @router.post("/register", response_model=Token)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = await _find_user(db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await _hash_or_503(get_password_hash_async(user.password))
     new_user = User(
         email=user.email,
         hashed_password=hashed_password,
         name=user.name
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    new_user = await _insert_user(db, new_user)
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -35,9 +52,9 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    db_user = await _find_user(db, user.email)
+    if not db_user or not await _hash_or_503(verify_password_async(user.password, db_user.hashed_password)):
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -46,7 +63,16 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    with stage("auth_lookup"):
+        return await _resolve_principal(token, db)
+
+async def _resolve_principal(token, db):
+    # Fast path: token yang sudah pernah diverifikasi tidak perlu jwt.decode + query lagi
+    principal = token_cache.get(token)
+    if principal is not None:
+        return principal
+
     credentials_exception = HTTPException(
         status_code=401,
         detail="Could not validate credentials",
@@ -60,7 +86,20 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.email == email).first()
+    user = await _find_user(db, email)
+    # Koneksi langsung balik ke pool, jangan tunggu teardown dependency
+    await db.close()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+
+    principal = UserPrincipal(user_id=user.user_id, email=user.email, name=user.name)
+    token_cache.put(token, principal, payload.get("exp"))
+    return principal
+
+@router.get("/cache/stats")
+def get_auth_cache_stats():
+    return token_cache.stats()
+
+@router.get("/hash/stats")
+def get_password_hash_stats():
+    return password_hash_pool.stats()
\ No newline at end of file
@@ -1,18 +1,134 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import Optional
+import gzip
+import hashlib
 import json
 import os
+import threading
+from collections import OrderedDict
+from app.config import ML_DIR
 
 router = APIRouter(prefix="/cluster", tags=["Cluster"])
 
-BASE_DIR = "/code/app/ml"
-METRICS_FILE = f"{BASE_DIR}/model_metrics.json"
+METRICS_FILE = os.path.join(ML_DIR, "model_metrics.json")
+
+
+# model_metrics.json disimpan di memori sebagai bytes yang sudah di-serialize & di-gzip,
+# per kombinasi field (LRU kecil). Cache dibuang otomatis kalau mtime/size file berubah (retrain).
+MAX_VARIANTS = 32
+
+
+class MetricsCache:
+    def __init__(self, path, max_variants=MAX_VARIANTS):
+        self.path = path
+        self.max_variants = max_variants
+        self._lock = threading.Lock()
+        self._signature = None
+        # (data, variants) selalu diganti bareng: request yang mulai sebelum reload
+        # cuma pernah menulis ke dict variants milik snapshot lamanya
+        self._state = (None, OrderedDict())
+
+    def _reload_if_changed(self):
+        st = os.stat(self.path)
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return self._state
+        with self._lock:
+            if signature != self._signature:
+                with open(self.path, "r") as f:
+                    self._state = (json.load(f), OrderedDict())
+                self._signature = signature
+            return self._state
+
+    def get(self, fields=None):
+        data, variants = self._reload_if_changed()
+
+        key = tuple(sorted(set(fields))) if fields else None
+        with self._lock:
+            variant = variants.get(key)
+            if variant is not None:
+                variants.move_to_end(key)
+                return variant
+
+        if key:
+            unknown = [f for f in key if f not in data]
+            if unknown:
+                raise KeyError(", ".join(unknown))
+            data = {f: data[f] for f in key}
+
+        body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Representasi beda (identity vs gzip) = strong ETag beda (RFC 9110 8.8.3)
+        variant = {
+            "body": body,
+            "gzip": gzip.compress(body, compresslevel=6),
+            "etag": f'"{digest}"',
+            "etag_gzip": f'"{digest}-gz"'
+        }
+        with self._lock:
+            variants[key] = variant
+            while len(variants) > self.max_variants:
+                variants.popitem(last=False)
+        return variant
+
+
+metrics_cache = MetricsCache(METRICS_FILE)
+
+
+# If-None-Match pakai weak comparison: W/"x" cocok dengan "x"
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+
+
+# "gzip;q=0" = ditolak; tanpa token gzip ikut q dari "*" (kalau ada)
+def _accepts_gzip(accept_encoding):
+    q = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        q[coding] = weight
+    return q.get("gzip", q.get("*", 0.0)) > 0
+
 
 @router.get("/metrics")
-def get_model_metrics():
+def get_model_metrics(request: Request, fields: Optional[str] = None):
     if not os.path.exists(METRICS_FILE):
         return {"error": "Metrics file not found"}
+
+    # ?fields=elbow_curve,cluster_counts -> cuma kirim key yang dirender chart
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
     try:
-        with open(METRICS_FILE, "r") as f:
-            return json.load(f)
+        variant = metrics_cache.get(field_list)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics fields: {e.args[0]}")
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+    use_gzip = _accepts_gzip(request.headers.get("accept-encoding", ""))
+    etag = variant["etag_gzip"] if use_gzip else variant["etag"]
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=variant["gzip"], media_type="application/json", headers=headers)
+    return Response(content=variant["body"], media_type="application/json", headers=headers)
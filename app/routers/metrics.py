@@ -0,0 +1,68 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.metrics import registry, http_in_flight
+from app.database import engine, async_engine, pool_stats
+from app.services.log_writer import prediction_log_writer
+from app.services.auth_cache import token_cache
+from app.services.response_cache import profile_cache
+from app.services.model_store import model_store
+from app.services.log_rollup import log_rollup
+from app.services.logging_pipeline import logging_pipeline
+from app.services.drift import drift_monitor
+from app.security import password_hash_pool
+
+router = APIRouter(tags=["Metrics"])
+
+# Stats yang sudah ada di tiap service ikut diekspor (dibaca saat scrape, bukan di hot path)
+registry.register_stats(
+    "prediction_log_writer", prediction_log_writer.stats,
+    counters=("enqueued", "dropped", "written", "failed", "batches"),
+    help_text="Write-behind PredictionLog"
+)
+registry.register_stats(
+    "auth_token_cache", token_cache.stats,
+    counters=("hits", "misses", "evictions", "invalidations"),
+    help_text="Token -> principal cache"
+)
+registry.register_stats(
+    "password_hash_pool", password_hash_pool.stats,
+    counters=("completed", "rejected"),
+    help_text="bcrypt process pool"
+)
+registry.register_stats(
+    "profile_cache", profile_cache.stats,
+    counters=("hits", "misses", "coalesced", "evictions", "bypassed"),
+    help_text="/recommend/user response cache"
+)
+
+registry.register_stats(
+    "prediction_log_rollup", log_rollup.stats,
+    counters=("runs", "failures", "skipped"),
+    help_text="Daily prediction log rollup"
+)
+registry.register_stats(
+    "app_log", logging_pipeline.stats,
+    counters=("dropped", "sampled_out"),
+    help_text="Structured log queue"
+)
+registry.register_stats("http_requests_in_flight", lambda: http_in_flight, help_text="Concurrent HTTP requests")
+registry.register_stats("db_pool", lambda: pool_stats(async_engine), help_text="Async engine connection pool")
+registry.register_stats("db_pool_sync", lambda: pool_stats(engine), help_text="Sync engine connection pool")
+
+def _model_stats():
+    bundle = model_store.current()
+    if bundle is None:
+        return {"loaded": 0}
+    return {"loaded": 1, "n_clusters": bundle.scorer.n_clusters, "catalog_size": bundle.product_index.size if bundle.product_index else 0}
+
+registry.register_stats("model", _model_stats, help_text="Active model bundle")
+registry.register_stats(
+    "feature_drift", lambda: drift_monitor.stats(model_store.current()),
+    counters=("observed",),
+    help_text="Input feature drift (5 min window)"
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.routers.auth import get_current_user
+from app.services.model_store import model_store
+from app.services.drift import drift_monitor
+from app.config import DRIFT_WINDOWS
+
+router = APIRouter(prefix="/models", tags=["Models"])
+
+@router.get("/version")
+def get_model_version():
+    bundle = model_store.current()
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="AI Models not ready.")
+    return bundle.info()
+
+# Hot reload manual setelah retrain (watcher juga otomatis reload kalau file berubah)
+@router.post("/reload")
+def reload_models(current_user=Depends(get_current_user)):
+    previous = model_store.current()
+    bundle = model_store.reload(force=True)
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="AI Models could not be loaded. Please check backend logs.")
+    return {
+        "previous_version": previous.version if previous else None,
+        **bundle.info()
+    }
+
+# Drift fitur input /recommend/user vs distribusi training: mean shift (z), std ratio, PSI per fitur
+# dan PSI komposisi cluster. windows dalam detik, mis. ?windows=300,3600
+@router.get("/drift")
+def get_drift(windows: str = DRIFT_WINDOWS):
+    bundle = model_store.current()
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="AI Models not ready.")
+    try:
+        seconds = [int(w) for w in windows.split(",") if w.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="windows must be comma-separated seconds")
+    if not seconds or min(seconds) <= 0:
+        raise HTTPException(status_code=422, detail="windows must be positive")
+    return {
+        "model_version": bundle.version,
+        "observed": drift_monitor.observed,
+        "windows": [drift_monitor.report(bundle, w) for w in seconds]
+    }
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import List, Optional
-from app.database import get_db
-from app.models.product import Product
+from app.routers.auth import get_current_user
+from app.services.catalog import catalog
+from app.services.model_store import model_store
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/products", tags=["Products"])
@@ -16,14 +16,50 @@ class ProductResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Keyset pagination: kirim `cursor` = X-Next-Cursor dari halaman sebelumnya
 @router.get("/", response_model=List[ProductResponse])
-def get_all_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    products = db.query(Product).offset(skip).limit(limit).all()
+async def get_all_products(
+    response: Response,
+    limit: int = 100,
+    cursor: Optional[int] = None,
+    skip: int = 0,
+    category: Optional[str] = None,
+    style: Optional[str] = None
+):
+    limit = max(0, min(limit, 1000))
+    snapshot = await catalog.snapshot_async()
+    products, next_cursor = snapshot.page(limit, cursor=cursor, skip=max(0, skip), category=category, style=style)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
     return products
 
+@router.post("/refresh")
+async def refresh_catalog(current_user=Depends(get_current_user)):
+    return (await catalog.refresh_async()).stats()
+
 @router.get("/{pid}", response_model=ProductResponse)
-def get_product_detail(pid: int, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(Product.product_id == pid).first()
+async def get_product_detail(pid: int):
+    product = (await catalog.snapshot_async()).get(pid)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
\ No newline at end of file
+    return product
+
+# Item-to-item: baca tabel tetangga yang dihitung trainer (cosine di embedding produk:
+# price, complexity, popularity, category, tier). Tidak ada similarity yang dihitung per request.
+@router.get("/{pid}/similar")
+async def get_similar_products(pid: int, k: int = 10):
+    bundle = model_store.current()
+    index = bundle.product_index if bundle else None
+    if index is None or not index.has_neighbors:
+        raise HTTPException(status_code=503, detail="Similar-product index not available. Re-run 2_train_model.py (--export-only for existing models).")
+    row = index.row_of(pid)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    rows, scores = index.similar(row, k)
+    source = index.record(row)
+    reason = f"Similar to {source['name']}" if "name" in source else "Similar product"
+    return {
+        "product_id": pid,
+        "model_version": bundle.version,
+        "similar": index.records(rows, scores, reason)
+    }
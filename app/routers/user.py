@@ -1,32 +1,20 @@
-from fastapi import APIRouter, HTTPException
-import joblib
-import pandas as pd
-import numpy as np
+from fastapi import APIRouter, HTTPException, Response
 from app.schemas.recommend import PredictionRequest
+from app.services.model_store import model_store
+from app.services.scoring import request_features
+from app.services.metrics import ERRORS
 
 router = APIRouter(prefix="/cluster", tags=["Cluster"])
 
-try:
-    scaler = joblib.load("app/ml/scaler_preproc.joblib")
-    kmeans = joblib.load("app/ml/kmeans_k2.joblib")
-except Exception as e:
-    print(f"Error loading models: {e}")
-
 @router.post("/predict")
-def predict_cluster(data: PredictionRequest):
-    input_data = data.dict()
-    df = pd.DataFrame([input_data])
-    
-    df["Monetary_Log"] = np.log1p(df["Monetary"])
-    
-    use_cols = [
-        "Recency","Frequency","Monetary_Log","Avg_Items",
-        "Unique_Products","Wishlist_Count","Add_to_Cart_Count","Page_Views"
-    ]
-    
+def predict_cluster(data: PredictionRequest, response: Response):
+    bundle = model_store.current()
+    if bundle is None:
+        raise HTTPException(status_code=503, detail="AI Models not ready.")
+    response.headers["X-Model-Version"] = bundle.version
     try:
-        X = scaler.transform(df[use_cols])
-        cluster = int(kmeans.predict(X)[0])
-        return {"cluster": cluster}
+        cluster = bundle.scorer.predict_one(request_features(data))
+        return {"cluster": cluster, "model_version": bundle.version}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        ERRORS.inc(where="cluster_predict")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -13,4 +13,7 @@ class PredictionRequest(BaseModel):
 
 class RecommendationResponse(BaseModel):
     cluster: int
-    recommendations: List[dict]
\ No newline at end of file
+    recommendations: List[dict]
+
+class BatchPredictionRequest(BaseModel):
+    items: List[PredictionRequest]
@@ -1,8 +1,15 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 from app.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.config import PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_CONCURRENCY, PASSWORD_HASH_MAX_WAITING
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -21,4 +28,98 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
+
+class PasswordHashBusy(Exception):
+    pass
+
+
+def _timed_call(fn, *args):
+    # Jalan di worker process: catat kapan mulai supaya waktu antre bisa dihitung
+    started = time.time()
+    result = fn(*args)
+    return started, time.time() - started, result
+
+
+# Pool terpisah untuk bcrypt supaya hashing (CPU-bound, pegang GIL) tidak rebutan
+# threadpool dengan /recommend dan /products. Burst login cuma memperlambat auth.
+class PasswordHashPool:
+    def __init__(self, workers=PASSWORD_HASH_WORKERS, max_concurrency=PASSWORD_HASH_MAX_CONCURRENCY, max_waiting=PASSWORD_HASH_MAX_WAITING):
+        self.workers = workers
+        self.max_waiting = max_waiting
+        self._executor = None
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+        self._lock = threading.Lock()
+
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_time_total = 0.0
+        self.queue_time_max = 0.0
+        self.run_time_total = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                ctx = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+            return self._executor
+
+    async def run(self, fn, *args):
+        if self.workers <= 0:
+            return await run_in_threadpool(fn, *args)
+
+        if self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise PasswordHashBusy()
+
+        submitted = time.time()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            future = self._get_executor().submit(_timed_call, fn, *args)
+            started, run_time, result = await asyncio.wrap_future(future)
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+        queue_time = max(0.0, started - submitted)
+        self.completed += 1
+        self.queue_time_total += queue_time
+        self.queue_time_max = max(self.queue_time_max, queue_time)
+        self.run_time_total += run_time
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    def stats(self):
+        done = self.completed or 1
+        return {
+            "workers": self.workers,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_queue_ms": round(self.queue_time_total / done * 1000, 2),
+            "max_queue_ms": round(self.queue_time_max * 1000, 2),
+            "avg_hash_ms": round(self.run_time_total / done * 1000, 2)
+        }
+
+
+password_hash_pool = PasswordHashPool()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await password_hash_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await password_hash_pool.run(get_password_hash, password)
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+import numpy as np
+from app.services.retrieval import prepare_index, USER_FEATURE_IDX
+
+# Format artefak serving tanpa pickle/sklearn: array mentah (.npy, bisa di-mmap read-only)
+# di app/ml/arrays/<version>/ + model_manifest.json yang menunjuk ke direktori itu.
+# N worker uvicorn yang mmap file yang sama berbagi satu salinan di page cache.
+MANIFEST_FILE = "model_manifest.json"
+ARRAYS_DIR = "arrays"
+FORMAT_NAME = "recsys-arrays"
+FORMAT_VERSION = 1
+KEEP_VERSIONS = 3
+
+
+def _entry(name, array):
+    return {"file": f"{name}.npy", "dtype": str(array.dtype), "shape": list(array.shape)}
+
+def _save(dir_path, name, array):
+    np.save(os.path.join(dir_path, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+    return _entry(name, array)
+
+
+# String object array -> fixed-width unicode (mmap-able, tanpa pickle)
+def _plain(array):
+    array = np.asarray(array)
+    return array.astype(str) if array.dtype == object else array
+
+
+# Dipanggil trainer setelah artefak joblib ditulis. topn_rows[k] = baris produk top-N cluster k,
+# topn_reasons[k] = teks reason-nya (sama dengan topN_by_cluster.joblib).
+def export_arrays(base_dir, scaler_mean, scaler_scale, centroids, index_artifact, topn_rows, topn_reasons, meta=None):
+    vectors, columns, subsets = prepare_index(index_artifact)
+
+    arrays = {
+        "scaler_mean": np.asarray(scaler_mean, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler_scale, dtype=np.float64),
+        "centroids": np.asarray(centroids, dtype=np.float64),
+        "product_vectors": vectors,
+        "user_min": np.asarray(index_artifact["user_min"], dtype=np.float64),
+        "user_range": np.asarray(index_artifact["user_range"], dtype=np.float64),
+        "topn_rows": np.asarray(topn_rows, dtype=np.int64)
+    }
+    for field, col in columns.items():
+        arrays[f"col_{field}"] = _plain(col)
+    # Tabel tetangga item-to-item (opsional): int32 baris + skor cosine float32, shape (n, k)
+    if "neighbors" in index_artifact:
+        arrays["neighbors"] = np.asarray(index_artifact["neighbors"], dtype=np.int32)
+        arrays["neighbor_scores"] = np.asarray(index_artifact["neighbor_scores"], dtype=np.float32)
+
+    # Subset filter: satu array baris + offset per key, jadi tidak perlu dihitung ulang per worker
+    subset_keys = sorted(subsets, key=lambda k: (k[0] or "", k[1] or ""))
+    offsets = []
+    pos = 0
+    for key in subset_keys:
+        offsets.append({"category": key[0], "tier": key[1], "offset": pos, "length": int(subsets[key].size)})
+        pos += subsets[key].size
+    arrays["subset_rows"] = (
+        np.concatenate([subsets[k] for k in subset_keys]).astype(np.int64) if subset_keys else np.empty(0, dtype=np.int64)
+    )
+
+    # Versi = hash isi (array + metadata), jadi export ulang model yang sama -> versi sama
+    h = hashlib.sha256()
+    for name in sorted(arrays):
+        h.update(name.encode())
+        h.update(np.ascontiguousarray(arrays[name]).tobytes())
+    h.update(json.dumps(meta or {}, sort_keys=True, default=str).encode())
+    h.update(json.dumps(list(topn_reasons)).encode())
+    version = h.hexdigest()[:12]
+
+    rel_dir = os.path.join(ARRAYS_DIR, version)
+    dir_path = os.path.join(base_dir, rel_dir)
+    if os.path.isdir(dir_path):
+        # Versi ini sudah ada (dan mungkin sedang di-mmap worker): jangan ditimpa
+        entries = {name: _entry(name, array) for name, array in arrays.items()}
+    else:
+        tmp_dir = dir_path + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        entries = {name: _save(tmp_dir, name, array) for name, array in arrays.items()}
+        os.replace(tmp_dir, dir_path)
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "dir": rel_dir,
+        "user_feature_idx": list(index_artifact.get("user_feature_idx", USER_FEATURE_IDX)),
+        "record_fields": list(columns),
+        "topn_reasons": list(topn_reasons),
+        "subsets": offsets,
+        "arrays": entries
+    }
+    # Manifest ditulis terakhir (atomic): reader selalu lihat versi lama utuh atau versi baru utuh
+    manifest_path = os.path.join(base_dir, MANIFEST_FILE)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+    _prune_versions(base_dir, keep=version)
+    return manifest
+
+
+# Versi lama disisakan beberapa: worker yang belum reload masih mmap file-nya
+def _prune_versions(base_dir, keep):
+    root = os.path.join(base_dir, ARRAYS_DIR)
+    dirs = [d for d in os.listdir(root) if d != keep and not d.endswith(".tmp")]
+    dirs.sort(key=lambda d: os.path.getmtime(os.path.join(root, d)), reverse=True)
+    for d in dirs[KEEP_VERSIONS - 1:]:
+        shutil.rmtree(os.path.join(root, d), ignore_errors=True)
+
+
+def read_manifest(base_dir):
+    path = os.path.join(base_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_NAME or manifest.get("format_version", 0) > FORMAT_VERSION:
+        return None
+    return manifest
+
+
+# Semua array di-mmap read-only; tidak ada unpickle dan tidak ada import sklearn
+def load_arrays(base_dir, manifest):
+    dir_path = os.path.join(base_dir, manifest["dir"])
+    arrays = {}
+    for name, entry in manifest["arrays"].items():
+        # Array kosong tidak bisa di-mmap
+        mmap_mode = "r" if np.prod(entry["shape"]) > 0 else None
+        arr = np.load(os.path.join(dir_path, entry["file"]), mmap_mode=mmap_mode, allow_pickle=False)
+        if list(arr.shape) != entry["shape"] or str(arr.dtype) != entry["dtype"]:
+            raise ValueError(f"Artifact {name} does not match manifest")
+        arrays[name] = arr
+    return arrays
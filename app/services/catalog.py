@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from bisect import bisect_right
+from sqlalchemy import select
+from app.database import SessionLocal, AsyncSessionLocal
+from app.models.product import Product
+from app.config import CATALOG_REFRESH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+# Snapshot read-only tabel products. Semua list id sudah terurut, jadi halaman
+# berikutnya cukup bisect ke cursor lalu slice `limit` item (tanpa OFFSET ke DB).
+class CatalogSnapshot:
+    def __init__(self, rows):
+        self.by_id = {}
+        self.ids = []
+        self.by_category = {}
+        self.by_style = {}
+        self.by_category_style = {}
+        for row in rows:
+            pid = row["product_id"]
+            self.by_id[pid] = row
+            self.ids.append(pid)
+            self.by_category.setdefault(row["category"], []).append(pid)
+            self.by_style.setdefault(row["style"], []).append(pid)
+            self.by_category_style.setdefault((row["category"], row["style"]), []).append(pid)
+        self.built_at = time.time()
+
+    def _index_for(self, category=None, style=None):
+        if category is not None and style is not None:
+            return self.by_category_style.get((category, style), [])
+        if category is not None:
+            return self.by_category.get(category, [])
+        if style is not None:
+            return self.by_style.get(style, [])
+        return self.ids
+
+    # Return (items, next_cursor). `cursor` = product_id terakhir dari halaman sebelumnya
+    def page(self, limit, cursor=None, skip=0, category=None, style=None):
+        ids = self._index_for(category, style)
+        start = bisect_right(ids, cursor) if cursor is not None else 0
+        start += skip
+        page_ids = ids[start:start + limit]
+        next_cursor = page_ids[-1] if page_ids and start + limit < len(ids) else None
+        return [self.by_id[pid] for pid in page_ids], next_cursor
+
+    def get(self, pid):
+        return self.by_id.get(pid)
+
+    def stats(self):
+        return {
+            "products": len(self.ids),
+            "categories": len(self.by_category),
+            "styles": len(self.by_style),
+            "built_at": self.built_at
+        }
+
+
+CATALOG_QUERY = select(Product.product_id, Product.name, Product.category, Product.style).order_by(Product.product_id)
+
+
+def _build_snapshot(rows):
+    return CatalogSnapshot(
+        {"product_id": r[0], "name": r[1], "category": r[2], "style": r[3]} for r in rows
+    )
+
+
+class Catalog:
+    def __init__(self, refresh_interval=CATALOG_REFRESH_INTERVAL, session_factory=SessionLocal, async_session_factory=AsyncSessionLocal):
+        self.refresh_interval = refresh_interval
+        self.session_factory = session_factory
+        self.async_session_factory = async_session_factory
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def snapshot(self):
+        snap = self._snapshot
+        if snap is None:
+            snap = self.refresh()
+        return snap
+
+    # Versi async untuk handler di event loop (snapshot pertama / POST /products/refresh)
+    async def snapshot_async(self):
+        snap = self._snapshot
+        if snap is None:
+            snap = await self.refresh_async()
+        return snap
+
+    # Bangun snapshot baru lalu swap; request yang sedang jalan tetap pakai snapshot lama
+    def refresh(self):
+        with self._lock:
+            db = self.session_factory()
+            try:
+                rows = db.execute(CATALOG_QUERY).all()
+            finally:
+                db.close()
+            self._snapshot = _build_snapshot(rows)
+            return self._snapshot
+
+    async def refresh_async(self):
+        async with self.async_session_factory() as db:
+            rows = (await db.execute(CATALOG_QUERY)).all()
+        # Swap referensi atomic, tidak perlu lock thread
+        self._snapshot = _build_snapshot(rows)
+        return self._snapshot
+
+    def start(self):
+        if self.refresh_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Catalog refresh failed: %s", e)
+
+
+catalog = Catalog()
@@ -0,0 +1,237 @@
+import math
+import threading
+import time
+import numpy as np
+from app.services.scoring import MONETARY_IDX
+from app.config import DRIFT_BUCKET_SECONDS, DRIFT_BUCKETS, DRIFT_MIN_SAMPLES
+
+# Bin histogram di ruang z (terstandardisasi dengan mean/std training). Bin pertama/terakhir
+# menampung ekor (< -3 / >= 3). Trainer menyimpan proporsi bin yang sama di model_metrics.json.
+DRIFT_Z_EDGES = np.array([-3.0, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 3.0])
+N_BINS = len(DRIFT_Z_EDGES) + 1
+
+PSI_WARN = 0.1
+PSI_DRIFT = 0.25
+MEAN_SHIFT_WARN = 0.5
+PSI_EPS = 1e-4
+
+
+# Dipakai trainer: proporsi data training per bin (Z sudah di-standardize)
+def reference_histograms(Z):
+    Z = np.asarray(Z, dtype=np.float64)
+    counts = np.stack([np.bincount(np.searchsorted(DRIFT_Z_EDGES, Z[:, j], side="right"), minlength=N_BINS) for j in range(Z.shape[1])])
+    return {
+        "z_edges": DRIFT_Z_EDGES.tolist(),
+        "feature_hist": np.round(counts / max(1, Z.shape[0]), 6).tolist()
+    }
+
+
+# Artefak lama tanpa drift_reference: asumsikan tiap fitur ~ normal di ruang z
+def _normal_reference(n_features):
+    cdf = [0.0] + [0.5 * (1 + math.erf(e / math.sqrt(2))) for e in DRIFT_Z_EDGES] + [1.0]
+    probs = np.diff(cdf)
+    return np.tile(probs, (n_features, 1))
+
+
+def psi(live, ref):
+    live = np.clip(live, PSI_EPS, None)
+    ref = np.clip(ref, PSI_EPS, None)
+    return ((live - ref) * np.log(live / ref)).sum(axis=-1)
+
+
+# Akumulator satu bucket waktu: Welford (n, mean, M2) + histogram per fitur + jumlah per cluster
+class _Bucket:
+    __slots__ = ("bucket_id", "n", "mean", "m2", "hist", "clusters")
+
+    def __init__(self, n_features, n_clusters):
+        self.bucket_id = -1
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.hist = np.zeros((n_features, N_BINS), dtype=np.int64)
+        self.clusters = np.zeros(n_clusters, dtype=np.int64)
+
+    def reset(self, bucket_id):
+        self.bucket_id = bucket_id
+        self.n = 0
+        self.mean[:] = 0
+        self.m2[:] = 0
+        self.hist[:] = 0
+        self.clusters[:] = 0
+
+
+# Ring buffer bucket milik SATU thread: hanya thread itu yang menulis, jadi hot path tanpa lock.
+# Pembaca (endpoint) menggabungkan semua shard; snapshot boleh sedikit "sobek" (monitoring saja).
+class _Shard:
+    def __init__(self, n_features, n_clusters, n_buckets):
+        self.buckets = [_Bucket(n_features, n_clusters) for _ in range(n_buckets)]
+
+
+class DriftMonitor:
+    def __init__(self, bucket_seconds=DRIFT_BUCKET_SECONDS, n_buckets=DRIFT_BUCKETS, min_samples=DRIFT_MIN_SAMPLES):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._shards = []
+        self._local = threading.local()
+        self.version = None
+        self.started_at = time.time()
+        self._feature_idx = np.arange(0)
+        self.observed = 0
+
+    # Ganti model = distribusi referensi baru; statistik live mulai dari nol
+    def _reset(self, bundle):
+        with self._lock:
+            if self.version == bundle.version:
+                return
+            self.version = bundle.version
+            self._mean = bundle.scorer.mean
+            self._scale = bundle.scorer.scale
+            self._n_features = len(self._mean)
+            self._n_clusters = bundle.scorer.n_clusters
+            self._feature_idx = np.arange(self._n_features)
+            self._shards = []
+            self._local = threading.local()
+            self.started_at = time.time()
+
+    # Lock cuma saat thread pertama kali menulis. Shard thread yang sudah mati tetap disimpan
+    # (datanya masih masuk window); jumlahnya dibatasi ukuran threadpool
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = _Shard(self._n_features, self._n_clusters, self.n_buckets)
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    # O(1) per request: satu update Welford + satu increment histogram per fitur
+    def observe(self, bundle, raw, cluster):
+        if bundle.version != self.version:
+            self._reset(bundle)
+        x = np.array(raw, dtype=np.float64)
+        x[MONETARY_IDX] = np.log1p(x[MONETARY_IDX])
+
+        bucket_id = int(time.time() // self.bucket_seconds)
+        b = self._shard().buckets[bucket_id % self.n_buckets]
+        if b.bucket_id != bucket_id:
+            b.reset(bucket_id)
+        b.n += 1
+        delta = x - b.mean
+        b.mean += delta / b.n
+        b.m2 += delta * (x - b.mean)
+        z = (x - self._mean) / self._scale
+        b.hist[self._feature_idx, np.searchsorted(DRIFT_Z_EDGES, z, side="right")] += 1
+        b.clusters[cluster] += 1
+        self.observed += 1
+
+    # Gabungkan bucket dalam window dari semua shard (merge Welford paralel / Chan et al.)
+    def _merge(self, window_seconds):
+        now_id = int(time.time() // self.bucket_seconds)
+        first_id = now_id - max(1, math.ceil(window_seconds / self.bucket_seconds)) + 1
+        n, mean, m2 = 0, np.zeros(self._n_features), np.zeros(self._n_features)
+        hist = np.zeros((self._n_features, N_BINS), dtype=np.int64)
+        clusters = np.zeros(self._n_clusters, dtype=np.int64)
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for b in shard.buckets:
+                if b.bucket_id < first_id or b.bucket_id > now_id or b.n == 0:
+                    continue
+                total = n + b.n
+                delta = b.mean - mean
+                mean = mean + delta * b.n / total
+                m2 = m2 + b.m2 + delta ** 2 * n * b.n / total
+                n = total
+                hist += b.hist
+                clusters += b.clusters
+        return n, mean, m2, hist, clusters
+
+    def report(self, bundle, window_seconds):
+        if bundle.version != self.version:
+            self._reset(bundle)
+        window_seconds = min(window_seconds, self.bucket_seconds * self.n_buckets)
+        n, mean, m2, hist, clusters = self._merge(window_seconds)
+
+        meta = bundle.meta
+        names = meta.get("feature_readable") or [str(i) for i in range(self._n_features)]
+        reference = meta.get("drift_reference")
+        if reference and reference.get("z_edges") == DRIFT_Z_EDGES.tolist():
+            ref_hist = np.asarray(reference["feature_hist"], dtype=np.float64)
+            ref_source = "training_histogram"
+        else:
+            # Fitur skewed (count, recency) jelas tidak normal -> PSI cuma indikatif,
+            # status fitur pakai mean shift saja
+            ref_hist = _normal_reference(self._n_features)
+            ref_source = "normal_approximation"
+        psi_weight = 1.0 if ref_source == "training_histogram" else 0.0
+
+        result = {
+            "window_seconds": window_seconds,
+            "samples": int(n),
+            "model_version": self.version,
+            "reference": ref_source,
+            "status": "insufficient_data",
+            "features": [],
+            "clusters": None
+        }
+        if n == 0:
+            return result
+
+        std = np.sqrt(m2 / n)
+        mean_shift = (mean - self._mean) / self._scale
+        feature_psi = psi(hist / n, ref_hist)
+        for j, name in enumerate(names):
+            result["features"].append({
+                "feature": name,
+                "live_mean": round(float(mean[j]), 4),
+                "train_mean": round(float(self._mean[j]), 4),
+                "mean_shift_z": round(float(mean_shift[j]), 4),
+                "std_ratio": round(float(std[j] / self._scale[j]), 4),
+                "psi": round(float(feature_psi[j]), 4),
+                "status": _status(feature_psi[j] * psi_weight, mean_shift[j])
+            })
+
+        train_counts = meta.get("cluster_counts") or {}
+        train_mix = np.array([float(train_counts.get(str(k), train_counts.get(k, 0))) for k in range(self._n_clusters)])
+        live_mix = clusters / n
+        if train_mix.sum() > 0:
+            train_mix = train_mix / train_mix.sum()
+            result["clusters"] = {
+                "live_mix": np.round(live_mix, 4).tolist(),
+                "train_mix": np.round(train_mix, 4).tolist(),
+                "psi": round(float(psi(live_mix, train_mix)), 4)
+            }
+
+        if n >= self.min_samples:
+            statuses = [f["status"] for f in result["features"]]
+            if result["clusters"] is not None:
+                statuses.append(_status(result["clusters"]["psi"], 0.0))
+            result["status"] = "drift" if "drift" in statuses else "warn" if "warn" in statuses else "ok"
+        return result
+
+    # Untuk /metrics: PSI terbesar di window terpendek (tanpa bundle -> cuma counter)
+    def stats(self, bundle=None, window_seconds=None):
+        stats = {"observed": self.observed}
+        if bundle is None or self.version is None:
+            return stats
+        report = self.report(bundle, window_seconds or self.bucket_seconds * 5)
+        stats["window_samples"] = report["samples"]
+        if report["features"]:
+            stats["max_feature_psi"] = max(f["psi"] for f in report["features"])
+            stats["max_abs_mean_shift_z"] = max(abs(f["mean_shift_z"]) for f in report["features"])
+        if report["clusters"] is not None:
+            stats["cluster_psi"] = report["clusters"]["psi"]
+        return stats
+
+
+def _status(psi_value, mean_shift):
+    if psi_value >= PSI_DRIFT:
+        return "drift"
+    if psi_value >= PSI_WARN or abs(mean_shift) >= MEAN_SHIFT_WARN:
+        return "warn"
+    return "ok"
+
+
+drift_monitor = DriftMonitor()
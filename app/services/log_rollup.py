@@ -0,0 +1,187 @@
+import logging
+import threading
+from collections import Counter
+from datetime import datetime, time, timedelta, timezone
+from sqlalchemy import select, delete, func, true
+from app.database import engine
+from app.services.worker_lock import WorkerLock
+from app.models.log import PredictionLog
+from app.models.rollup import ClusterDailyRollup, ProductDailyRollup
+from app.config import LOG_RETENTION_DAYS, LOG_ROLLUP_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+def _day_bounds(day):
+    start = datetime.combine(day, time.min, tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _as_date(value):
+    # SQLite mengembalikan string untuk func.min(created_at)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _cluster_counts(conn, start, end):
+    logs = PredictionLog.__table__
+    version = func.coalesce(logs.c.model_version, "")
+    return conn.execute(
+        select(version, logs.c.predicted_cluster, func.count(), func.count(logs.c.user_id.distinct()))
+        .where(logs.c.created_at >= start, logs.c.created_at < end, logs.c.predicted_cluster.isnot(None))
+        .group_by(version, logs.c.predicted_cluster)
+    ).all()
+
+
+# product_ids di-unnest di database (PostgreSQL: unnest, SQLite: json_each);
+# dialect lain dihitung per row di Python
+def _product_counts(conn, start, end):
+    logs = PredictionLog.__table__
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        items = func.unnest(logs.c.product_ids).table_valued("value").render_derived()
+    elif dialect == "sqlite":
+        items = func.json_each(logs.c.product_ids).table_valued("value")
+    else:
+        counts = Counter()
+        for (ids,) in conn.execute(
+            select(logs.c.product_ids).where(logs.c.created_at >= start, logs.c.created_at < end)
+        ):
+            counts.update(ids or ())
+        return list(counts.items())
+    return conn.execute(
+        select(items.c.value, func.count())
+        .select_from(logs.join(items, true()))
+        .where(logs.c.created_at >= start, logs.c.created_at < end)
+        .group_by(items.c.value)
+    ).all()
+
+
+# Hitung ulang agregat satu hari (idempotent: hapus lalu isi lagi dalam satu transaksi)
+def rollup_day(conn, day):
+    start, end = _day_bounds(day)
+    clusters = ClusterDailyRollup.__table__
+    products = ProductDailyRollup.__table__
+
+    cluster_rows = [
+        {"day": day, "model_version": ver, "cluster_id": cid, "predictions": n, "users": u}
+        for ver, cid, n, u in _cluster_counts(conn, start, end)
+    ]
+    product_rows = [
+        {"day": day, "product_id": int(pid), "impressions": n}
+        for pid, n in _product_counts(conn, start, end)
+    ]
+
+    conn.execute(delete(clusters).where(clusters.c.day == day))
+    conn.execute(delete(products).where(products.c.day == day))
+    if cluster_rows:
+        conn.execute(clusters.insert(), cluster_rows)
+    if product_rows:
+        conn.execute(products.insert(), product_rows)
+    return len(cluster_rows), len(product_rows)
+
+
+# Hari yang perlu di-rollup: dari hari rollup terakhir (dihitung ulang karena mungkin belum lengkap)
+# sampai hari ini. Belum pernah rollup -> mulai dari log tertua.
+def pending_days(conn, today):
+    last = conn.execute(select(func.max(ClusterDailyRollup.day))).scalar()
+    first = _as_date(last) if last is not None else _as_date(
+        conn.execute(select(func.min(PredictionLog.created_at))).scalar()
+    )
+    if first is None:
+        return []
+    return [first + timedelta(days=i) for i in range((today - first).days + 1)]
+
+
+# Raw log lebih tua dari retention window dihapus; agregatnya sudah ada di tabel rollup
+def prune_raw_logs(conn, today, retention_days=LOG_RETENTION_DAYS):
+    cutoff, _ = _day_bounds(today - timedelta(days=retention_days))
+    logs = PredictionLog.__table__
+    return conn.execute(delete(logs).where(logs.c.created_at < cutoff)).rowcount
+
+
+def run_rollup(bind=engine, retention_days=LOG_RETENTION_DAYS, today=None):
+    today = today or datetime.now(timezone.utc).date()
+    stats = {"days": 0, "cluster_rows": 0, "product_rows": 0, "pruned": 0}
+    with bind.connect() as conn:
+        days = pending_days(conn, today)
+    for day in days:
+        with bind.begin() as conn:
+            n_clusters, n_products = rollup_day(conn, day)
+        stats["days"] += 1
+        stats["cluster_rows"] += n_clusters
+        stats["product_rows"] += n_products
+    # Prune hanya setelah semua hari sampai hari ini ter-rollup
+    if retention_days > 0:
+        with bind.begin() as conn:
+            stats["pruned"] = prune_raw_logs(conn, today, retention_days)
+    return stats
+
+
+# Job periodik di dalam app (thread, engine sync). Interval 0 = nonaktif,
+# jalankan scripts/5_rollup_logs.py dari cron sebagai gantinya.
+# Dengan banyak worker uvicorn cuma satu yang jadi runner: worker yang dapat ROLLUP_LOCK memegangnya
+# sampai stop; worker lain mencoba lagi tiap interval (ambil alih kalau runner mati).
+ROLLUP_LOCK = "log_rollup"
+
+
+class LogRollupJob:
+    def __init__(self, interval=LOG_ROLLUP_INTERVAL, retention_days=LOG_RETENTION_DAYS, bind=engine):
+        self.interval = interval
+        self.retention_days = retention_days
+        self.bind = bind
+        self._lock = WorkerLock(ROLLUP_LOCK, bind)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_run = None
+        self.last_stats = {}
+
+    def run_once(self):
+        try:
+            if not self._lock.acquire(blocking=False):
+                self.skipped += 1
+                return self.last_stats
+        except Exception:
+            self.failures += 1
+            logger.exception("Log rollup lock failed")
+            return self.last_stats
+        try:
+            self.last_stats = run_rollup(self.bind, self.retention_days)
+            self.runs += 1
+        except Exception:
+            self.failures += 1
+            logger.exception("Log rollup failed")
+        self.last_run = datetime.now(timezone.utc).timestamp()
+        return self.last_stats
+
+    def start(self):
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-rollup", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(5)
+            self._thread = None
+        self._lock.release()
+
+    def stats(self):
+        return {
+            "runs": self.runs, "failures": self.failures, "skipped": self.skipped,
+            "leader": int(self._lock.held), "last_run": self.last_run, **self.last_stats
+        }
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+log_rollup = LogRollupJob()
@@ -0,0 +1,129 @@
+import logging
+import asyncio
+import time
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from app.database import AsyncSessionLocal
+from app.models.log import PredictionLog
+from app.services.metrics import stage, ERRORS
+from app.config import LOG_QUEUE_MAX, LOG_BATCH_SIZE, LOG_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+# Write-behind logger: request cuma taruh record di queue, task background di event loop
+# yang flush ke prediction_logs per batch (multi-row insert, satu commit) lewat engine async.
+# submit() dipanggil dari handler async (thread event loop), bukan dari threadpool.
+class PredictionLogWriter:
+    def __init__(self, maxsize=LOG_QUEUE_MAX, batch_size=LOG_BATCH_SIZE, flush_interval=LOG_FLUSH_INTERVAL, session_factory=AsyncSessionLocal):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+        self._queue = None
+        self._task = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def start(self):
+        if self._task and not self._task.done():
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="prediction-log-writer")
+
+    # Non-blocking: kalau queue penuh record di-drop (dan dihitung), request tidak ikut nunggu DB.
+    # Yang disimpan cuma product_id + versi model, bukan dict produk lengkap
+    def submit(self, user_id, predicted_cluster, recommendations, model_version):
+        if self._stopping:
+            self.dropped += 1
+            return False
+        if self._task is None:
+            self.start()
+        record = {
+            "user_id": user_id,
+            "predicted_cluster": predicted_cluster,
+            "product_ids": [int(p["product_id"]) for p in recommendations],
+            "model_version": model_version,
+            "created_at": datetime.now(timezone.utc)
+        }
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    # Flush semua yang masih di queue lalu matikan task
+    async def stop(self, timeout=10.0):
+        task = self._task
+        if task is None:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout)
+            await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Log writer shutdown timed out, pending logs may be lost")
+            task.cancel()
+        self._task = None
+        logger.info("Log writer stopped", extra={"stats": self.stats()})
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches
+        }
+
+    async def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _STOP:
+                await self._flush(batch)
+                return
+
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                await self._flush(batch)
+                batch = []
+
+    async def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            async with self.session_factory() as db:
+                with stage("log_commit"):
+                    await db.execute(insert(PredictionLog), batch)
+                    await db.commit()
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            ERRORS.inc(where="prediction_log")
+            logger.error("Prediction log flush failed: %s", e, extra={"records": len(batch)})
+
+
+prediction_log_writer = PredictionLogWriter()
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from app.config import APP_LOG_FILE, APP_LOG_LEVEL, APP_LOG_MAX_BYTES, APP_LOG_BACKUP_COUNT, APP_LOG_ROTATE_SECONDS
+from app.config import APP_LOG_QUEUE_MAX, APP_LOG_SAMPLE_RATES, APP_LOG_CONSOLE, APP_LOG_LEVELS
+
+# Field standar LogRecord; sisanya (dari extra=...) ikut ditulis sebagai field JSON
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sample_key"}
+
+
+# Satu JSON object per baris. Formatting jalan di thread listener, bukan di request
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+# Rotasi kalau file melewati max_bytes ATAU sudah berumur rotate_seconds (mana yang duluan)
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    def __init__(self, filename, max_bytes, backup_count, rotate_seconds):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8", delay=True)
+        self.rotate_seconds = rotate_seconds
+        self.next_rollover = time.time() + rotate_seconds if rotate_seconds > 0 else None
+
+    def shouldRollover(self, record):
+        if self.next_rollover is not None and time.time() >= self.next_rollover:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.rotate_seconds > 0:
+            self.next_rollover = time.time() + self.rotate_seconds
+
+
+# Sampling per endpoint untuk log sukses yang volumenya tinggi: logger.info(..., extra={"sample_key": "recommend_user"}).
+# WARNING ke atas dan record tanpa sample_key selalu lolos.
+class SamplingFilter(logging.Filter):
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+        self.sampled_out = 0
+
+    def filter(self, record):
+        key = getattr(record, "sample_key", None)
+        if key is None or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(key, 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+# Request thread cuma put_nowait ke queue; queue penuh -> record di-drop (dihitung), tidak pernah nunggu disk
+class NonBlockingQueueHandler(QueueHandler):
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    # Queue in-process: record tidak perlu di-format/dipickle di thread pemanggil
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(spec):
+    # "recommend_user=0.1,recommend_batch=0.5"
+    rates = {}
+    for part in spec.split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            rates[key.strip()] = min(1.0, max(0.0, float(value)))
+    return rates
+
+
+def parse_levels(spec):
+    # "app.database=WARNING,app.predictions=INFO"
+    levels = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, level = part.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class LoggingPipeline:
+    def __init__(self):
+        self._queue = None
+        self._listener = None
+        self._handler = None
+        self._sampler = None
+
+    def start(self, path=APP_LOG_FILE, level=APP_LOG_LEVEL, console=APP_LOG_CONSOLE):
+        if self._listener is not None:
+            return
+        self._queue = queue.Queue(maxsize=APP_LOG_QUEUE_MAX)
+        formatter = JsonFormatter()
+        handlers = []
+        if path:
+            path = path.replace("{pid}", str(os.getpid()))
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            file_handler = SizeAndTimeRotatingFileHandler(path, APP_LOG_MAX_BYTES, APP_LOG_BACKUP_COUNT, APP_LOG_ROTATE_SECONDS)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        if console:
+            stream_handler = logging.StreamHandler(sys.stdout)
+            stream_handler.setFormatter(formatter)
+            handlers.append(stream_handler)
+
+        self._sampler = SamplingFilter(parse_sample_rates(APP_LOG_SAMPLE_RATES))
+        self._handler = NonBlockingQueueHandler(self._queue)
+        self._handler.addFilter(self._sampler)
+
+        root = logging.getLogger("app")
+        root.setLevel(level)
+        for name, logger_level in parse_levels(APP_LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(logger_level)
+        root.addHandler(self._handler)
+        root.propagate = False
+
+        self._listener = QueueListener(self._queue, *handlers, respect_handler_level=True)
+        self._listener.start()
+
+    # Flush sisa record di queue ke disk lalu matikan listener
+    def stop(self):
+        if self._listener is None:
+            return
+        logging.getLogger("app").removeHandler(self._handler)
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        self._listener = None
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "dropped": self._handler.dropped if self._handler else 0,
+            "sampled_out": self._sampler.sampled_out if self._sampler else 0
+        }
+
+
+logging_pipeline = LoggingPipeline()
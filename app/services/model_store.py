@@ -0,0 +1,186 @@
+import logging
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from app.services.scoring import CompiledScorer
+from app.services.retrieval import ProductIndex
+from app.services.artifacts import MANIFEST_FILE, read_manifest, load_arrays
+from app.config import ML_DIR, MODEL_WATCH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS = ["scaler_preproc.joblib", "kmeans_k2.joblib", "topN_by_cluster.joblib", "model_metrics.json", "product_index.joblib", MANIFEST_FILE]
+JOBLIB_ARTIFACTS = ARTIFACTS[:-1]
+FALLBACK_RECS = [{"product_id": 0, "name": "General Item", "category": "General", "price": 10.0, "reason": "Fallback"}]
+
+
+# Satu versi model lengkap (scorer + topN + metadata). Tidak pernah diubah
+# setelah dibuat; reload = bikin bundle baru lalu swap referensinya.
+class ModelBundle:
+    def __init__(self, version, scorer, topN, meta, product_index=None, source="joblib"):
+        self.version = version
+        self.product_index = product_index
+        self.topN = topN
+        self.meta = meta
+        self.scorer = scorer
+        self.source = source
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        # Top-N per cluster sudah JSON-safe, tinggal dipakai per request
+        self._recs = {}
+        for key, recs in (topN or {}).items():
+            self._recs[int(key)] = jsonable_encoder(recs)
+
+    def recs_for(self, cluster):
+        return self._recs.get(int(cluster)) or FALLBACK_RECS
+
+    def info(self):
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "n_clusters": self.scorer.n_clusters,
+            "catalog_size": self.product_index.size if self.product_index else 0,
+            "similar_k": self.product_index.neighbors.shape[1] if self.product_index and self.product_index.has_neighbors else 0,
+            "cluster_names": self.meta.get("cluster_names", [])
+        }
+
+
+class ModelStore:
+    def __init__(self, base_dir=ML_DIR, watch_interval=MODEL_WATCH_INTERVAL):
+        self.base_dir = base_dir
+        self.watch_interval = watch_interval
+        self._bundle = None
+        self._signature = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def current(self):
+        bundle = self._bundle
+        if bundle is None:
+            bundle = self.reload()
+        return bundle
+
+    def _artifact_signature(self):
+        sig = []
+        for name in ARTIFACTS:
+            path = os.path.join(self.base_dir, name)
+            if os.path.exists(path):
+                st = os.stat(path)
+                sig.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def _compute_version(self):
+        h = hashlib.sha256()
+        for name in JOBLIB_ARTIFACTS:
+            path = os.path.join(self.base_dir, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    h.update(f.read())
+        return h.hexdigest()[:12]
+
+    def _load_meta(self):
+        metrics_file = os.path.join(self.base_dir, "model_metrics.json")
+        if not os.path.exists(metrics_file):
+            return {}
+        with open(metrics_file, "r") as f:
+            return json.load(f)
+
+    def _load_bundle(self):
+        # Artefak array (model_manifest.json) diutamakan; joblib hanya fallback artefak lama
+        manifest = read_manifest(self.base_dir)
+        if manifest is not None:
+            return self._load_arrays_bundle(manifest)
+        return self._load_joblib_bundle()
+
+    # mmap read-only: tanpa unpickle & tanpa sklearn, halaman file dibagi antar worker
+    def _load_arrays_bundle(self, manifest):
+        arrays = load_arrays(self.base_dir, manifest)
+        scorer = CompiledScorer(arrays["scaler_mean"], arrays["scaler_scale"], arrays["centroids"])
+
+        columns = {f: arrays[f"col_{f}"] for f in manifest["record_fields"]}
+        subset_rows = arrays["subset_rows"]
+        subsets = {
+            (s["category"], s["tier"]): subset_rows[s["offset"]:s["offset"] + s["length"]]
+            for s in manifest["subsets"]
+        }
+        product_index = ProductIndex.from_arrays(
+            arrays["product_vectors"], manifest["user_feature_idx"],
+            arrays["user_min"], arrays["user_range"], columns, subsets,
+            arrays.get("neighbors"), arrays.get("neighbor_scores")
+        )
+
+        topN = {}
+        for cluster, (rows, reason) in enumerate(zip(arrays["topn_rows"], manifest["topn_reasons"])):
+            recs = []
+            for row in rows:
+                rec = {f: col[row].item() for f, col in columns.items()}
+                rec["reason"] = reason
+                recs.append(rec)
+            topN[cluster] = recs
+
+        return ModelBundle(manifest["version"], scorer, topN, self._load_meta(), product_index, source="arrays")
+
+    def _load_joblib_bundle(self):
+        # joblib (dan sklearn/pandas lewat unpickle) baru di-import saat load, bukan saat import app
+        import joblib
+        scaler = joblib.load(os.path.join(self.base_dir, "scaler_preproc.joblib"))
+        kmeans = joblib.load(os.path.join(self.base_dir, "kmeans_k2.joblib"))
+        topN = joblib.load(os.path.join(self.base_dir, "topN_by_cluster.joblib"))
+        # Opsional: artefak lama tanpa product_index tetap jalan pakai topN per cluster
+        product_index = None
+        index_file = os.path.join(self.base_dir, "product_index.joblib")
+        if os.path.exists(index_file):
+            product_index = ProductIndex(joblib.load(index_file))
+        scorer = CompiledScorer.from_sklearn(scaler, kmeans)
+        return ModelBundle(self._compute_version(), scorer, topN, self._load_meta(), product_index)
+
+    # Load bundle baru di samping yang lama; kalau gagal, bundle lama tetap dipakai
+    def reload(self, force=False):
+        with self._reload_lock:
+            signature = self._artifact_signature()
+            if not force and self._bundle is not None and signature == self._signature:
+                return self._bundle
+            try:
+                bundle = self._load_bundle()
+            except Exception as e:
+                logger.warning("Model load failed, keeping previous bundle: %s", e)
+                return self._bundle
+            if self._bundle is None or bundle.version != self._bundle.version:
+                logger.info("Model bundle loaded", extra={"model_version": bundle.version, "source": bundle.source})
+            self._bundle = bundle
+            self._signature = signature
+            return bundle
+
+    def start_watching(self):
+        if self.watch_interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="model-store-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(self.watch_interval + 1)
+            self._watcher = None
+
+    def _watch(self):
+        pending = None
+        while not self._stop.wait(self.watch_interval):
+            signature = self._artifact_signature()
+            if signature == self._signature:
+                pending = None
+                continue
+            # Trainer nulis beberapa file; tunggu sampai signature stabil 1 interval dulu
+            if signature != pending:
+                pending = signature
+                continue
+            pending = None
+            self.reload()
+
+
+model_store = ModelStore()
@@ -0,0 +1,170 @@
+import numpy as np
+from sqlalchemy import select, func
+from starlette.concurrency import run_in_threadpool
+from app.models.user import User
+from app.models.recommendation import UserRecommendation
+from app.services.scoring import build_result, DEFAULT_CLUSTER_NAMES, RAW_COLS, MONETARY_IDX
+from app.services.segmentation import FEATURE_COLUMNS, feature_hash
+from app.services.metrics import stage
+from app.config import RECOMMEND_TOP_K, RECOMMEND_MAX_K
+
+
+def personal_recs(bundle, z, cluster, k, category=None, tier=None):
+    if bundle.product_index is None:
+        return bundle.recs_for(cluster)
+    k = max(1, min(k, RECOMMEND_MAX_K))
+    idx, scores = bundle.product_index.top_k(z, k, category=category, tier=tier)
+    cluster_names = bundle.meta.get("cluster_names", DEFAULT_CLUSTER_NAMES)
+    return bundle.product_index.records(idx, scores, f"Matches your {cluster_names[cluster]} spending profile")
+
+# 3-6. Full scoring path untuk satu profil (dipanggil hanya saat cache miss)
+def score_profile(bundle, raw, k, category=None, tier=None):
+    # 3-4. Predict Cluster, Distance & Confidence
+    # Fast path: tuple fitur langsung ke NumPy, tanpa DataFrame & tanpa sklearn
+    with stage("feature_prep"):
+        x = bundle.scorer.vectorize(raw)[None, :]
+    with stage("scale"):
+        z = bundle.scorer.transform(x)
+    with stage("predict"):
+        scored = bundle.scorer.score_scaled(z)
+        cluster = int(scored["cluster"][0])
+
+    # 5. RECOMMENDATIONS (FIXED: TRUST THE AI)
+    # Ranking full katalog terhadap profil user sendiri (cosine, top-K via argpartition).
+    # Artefak lama tanpa product index: fallback ke list per cluster dari Joblib
+    with stage("recommend"):
+        final_recs = personal_recs(bundle, scored["Z"][0], cluster, k, category, tier)
+
+    # 6. BUSINESS LOGIC & EXPLAINABILITY (driver, narrative, anomaly)
+    with stage("explain"):
+        features = dict(zip(RAW_COLS, raw))
+        result = build_result(scored, 0, features["Monetary"], features["Page_Views"], features["Recency"], bundle.meta, final_recs)
+    result["model_version"] = bundle.version
+    return result
+
+# Versi batch score_profile (default k, tanpa filter): satu score_batch untuk semua profil
+def score_profiles(bundle, raw):
+    X = np.array(raw, dtype=np.float64)
+    X[:, MONETARY_IDX] = np.log1p(X[:, MONETARY_IDX])
+    scored = bundle.scorer.score_batch(X)
+    results = []
+    for i, row in enumerate(raw):
+        cluster = int(scored["cluster"][i])
+        recs = personal_recs(bundle, scored["Z"][i], cluster, RECOMMEND_TOP_K)
+        features = dict(zip(RAW_COLS, row))
+        result = build_result(scored, i, features["Monetary"], features["Page_Views"], features["Recency"], bundle.meta, recs)
+        result["model_version"] = bundle.version
+        results.append(result)
+    return results
+
+
+def _clean_features(values):
+    return tuple(0 if v is None else v for v in values)
+
+
+# ---------------------------------------------------------------------------
+# Materialized recommendations (tabel user_recommendations)
+# ---------------------------------------------------------------------------
+def _insert_for(dialect_name):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+def upsert_recommendations(conn, rows):
+    if not rows:
+        return 0
+    table = UserRecommendation.__table__
+    insert = _insert_for(conn.dialect.name)
+    if insert is None:
+        # Dialect lain: delete + insert dalam transaksi yang sama
+        conn.execute(table.delete().where(table.c.user_id.in_([r["user_id"] for r in rows])))
+        conn.execute(table.insert(), rows)
+        return len(rows)
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={
+            "cluster_id": stmt.excluded.cluster_id,
+            "model_version": stmt.excluded.model_version,
+            "features_hash": stmt.excluded.features_hash,
+            "payload": stmt.excluded.payload,
+            "updated_at": func.now()
+        }
+    )
+    conn.execute(stmt, rows)
+    return len(rows)
+
+def _materialized_row(user_id, fhash, result):
+    return {
+        "user_id": int(user_id),
+        "cluster_id": result["cluster"],
+        "model_version": result["model_version"],
+        "features_hash": int(fhash),
+        "payload": result
+    }
+
+
+# Request path GET /recommend/me: satu read (users LEFT JOIN user_recommendations by PK).
+# Row valid -> langsung dipakai; belum ada / basi -> hitung (di threadpool), simpan, return.
+async def get_or_materialize(db, user_id, bundle):
+    users = User.__table__
+    recs = UserRecommendation.__table__
+    with stage("materialized_read"):
+        row = (await db.execute(
+            select(*FEATURE_COLUMNS, recs.c.model_version, recs.c.features_hash, recs.c.payload)
+            .select_from(users.outerjoin(recs, recs.c.user_id == users.c.user_id))
+            .where(users.c.user_id == user_id)
+        )).first()
+        # Kembalikan koneksi ke pool sekarang, jangan tunggu teardown dependency
+        await db.close()
+    if row is None:
+        return None, None
+
+    raw = _clean_features(row[:len(RAW_COLS)])
+    fhash = int(feature_hash(np.array([raw], dtype=np.float64))[0])
+    model_version, stored_hash, payload = row[len(RAW_COLS):]
+    if payload is not None and model_version == bundle.version and stored_hash == fhash:
+        return payload, "materialized"
+
+    result = await run_in_threadpool(score_profile, bundle, raw, RECOMMEND_TOP_K)
+    with stage("materialize_write"):
+        rows = [_materialized_row(user_id, fhash, result)]
+        await db.run_sync(lambda session: upsert_recommendations(session.connection(), rows))
+        await db.commit()
+    return result, "computed"
+
+
+# Job bulk (scripts/4_resegment_users.py --recommendations): untuk satu chunk users,
+# hitung ulang hanya user yang belum punya row atau row-nya basi.
+def materialize_chunk(engine, bundle, rows):
+    if not rows:
+        return 0
+    recs = UserRecommendation.__table__
+    user_ids = [r[0] for r in rows]
+    raw = [_clean_features(r[1:1 + len(RAW_COLS)]) for r in rows]
+    hashes = feature_hash(np.array(raw, dtype=np.float64))
+
+    with engine.connect() as conn:
+        existing = dict(
+            (uid, (ver, h)) for uid, ver, h in conn.execute(
+                select(recs.c.user_id, recs.c.model_version, recs.c.features_hash)
+                .where(recs.c.user_id.between(user_ids[0], user_ids[-1]))
+            )
+        )
+
+    stale = [
+        i for i, uid in enumerate(user_ids)
+        if existing.get(uid) != (bundle.version, int(hashes[i]))
+    ]
+    if not stale:
+        return 0
+
+    results = score_profiles(bundle, [raw[i] for i in stale])
+    with engine.begin() as conn:
+        return upsert_recommendations(conn, [
+            _materialized_row(user_ids[i], hashes[i], result) for i, result in zip(stale, results)
+        ])
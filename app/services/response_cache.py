@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from app.services.scoring import RAW_COLS
+from app.config import PROFILE_CACHE_SIZE, PROFILE_CACHE_BUCKETS
+
+# Lebar bucket default = step slider di simulator: profil dari slider selalu jatuh tepat di grid
+DEFAULT_BUCKETS = {
+    "Recency": 1,
+    "Frequency": 1,
+    "Monetary": 10,
+    "Avg_Items": 0.1,
+    "Unique_Products": 1,
+    "Wishlist_Count": 1,
+    "Add_to_Cart_Count": 1,
+    "Page_Views": 5
+}
+
+
+def parse_buckets(spec):
+    # "Monetary=50,Page_Views=10" -> override sebagian bucket default
+    buckets = dict(DEFAULT_BUCKETS)
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        name, width = part.split("=", 1)
+        name = name.strip()
+        if name in buckets and float(width) > 0:
+            buckets[name] = float(width)
+    return buckets
+
+
+# Cache response /recommend/user per profil (LRU), plus coalescing: request identik yang
+# datang bersamaan cuma dihitung sekali, sisanya nunggu hasil yang sama.
+# Hanya profil yang tepat di grid bucket yang di-cache (key space terbatas); profil di luar grid
+# di-score langsung. Key = nilai profil persis, jadi cache tidak pernah mengubah jawaban.
+class ProfileResponseCache:
+    def __init__(self, maxsize=PROFILE_CACHE_SIZE, buckets=None):
+        self.maxsize = maxsize
+        self.buckets = buckets or parse_buckets(PROFILE_CACHE_BUCKETS)
+        self._widths = [self.buckets[c] for c in RAW_COLS]
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.bypassed = 0
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    # Key cache untuk profil di grid, None kalau ada fitur di luar grid (tidak di-cache)
+    def key_for(self, raw):
+        for v, w in zip(raw, self._widths):
+            if abs(v / w - round(v / w)) > 1e-9:
+                with self._lock:
+                    self.bypassed += 1
+                return None
+        return tuple(float(v) for v in raw)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "buckets": self.buckets,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "bypassed": self.bypassed
+        }
+
+
+profile_cache = ProfileResponseCache()
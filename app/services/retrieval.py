@@ -0,0 +1,240 @@
+import numpy as np
+
+# Fitur user yang dipetakan ke ruang produk (sama dengan trainer: Monetary_Log & Avg_Items)
+USER_FEATURE_IDX = [2, 3]
+RECORD_FIELDS = ["product_id", "name", "category", "price", "tier", "complexity_score", "popularity_score"]
+
+
+# Build index dari katalog training + centroid (dipanggil trainer, hasilnya product_index.joblib)
+def build_product_index(df_prods, centroids):
+    prod_features = df_prods[["price", "complexity_score"]].to_numpy(dtype=np.float64)
+    p_min = prod_features.min(axis=0)
+    p_range = prod_features.max(axis=0) - p_min
+    p_range[p_range == 0] = 1.0
+    prod_vectors = (prod_features - p_min) / p_range
+
+    # Ruang user = min-max atas centroid, persis seperti cluster_vectors di trainer
+    cluster_power = np.asarray(centroids)[:, USER_FEATURE_IDX]
+    u_min = cluster_power.min(axis=0)
+    u_range = cluster_power.max(axis=0) - u_min
+    u_range[u_range == 0] = 1.0
+
+    artifact = {
+        "vectors": prod_vectors,
+        "user_feature_idx": USER_FEATURE_IDX,
+        "user_min": u_min,
+        "user_range": u_range
+    }
+    for field in RECORD_FIELDS:
+        if field in df_prods.columns:
+            artifact[field] = df_prods[field].to_numpy()
+    return artifact
+
+
+# Embedding item-to-item (beda dengan "vectors" yang dipetakan ke ruang user): numerik di-standardize
+# (price & popularity long-tail -> log1p dulu) + one-hot category/tier, tiap blok diberi bobot,
+# lalu L2-normalized supaya dot product = cosine.
+ITEM_NUMERIC_FIELDS = ["price", "complexity_score", "popularity_score"]
+ITEM_LOG_FIELDS = {"price", "popularity_score"}
+ITEM_BLOCK_WEIGHTS = {"numeric": 1.0, "category": 1.0, "tier": 0.5}
+SIMILAR_TOP_K = 20
+SIMILAR_BLOCK_SIZE = 2048
+
+
+def build_item_embedding(columns):
+    blocks = []
+    numeric = [f for f in ITEM_NUMERIC_FIELDS if f in columns]
+    if numeric:
+        X = np.column_stack([
+            np.log1p(np.asarray(columns[f], dtype=np.float64)) if f in ITEM_LOG_FIELDS
+            else np.asarray(columns[f], dtype=np.float64)
+            for f in numeric
+        ])
+        std = X.std(axis=0)
+        std[std == 0] = 1.0
+        blocks.append((X - X.mean(axis=0)) / std * (ITEM_BLOCK_WEIGHTS["numeric"] / np.sqrt(len(numeric))))
+    for field in ("category", "tier"):
+        if field in columns:
+            _, codes = np.unique(np.asarray(columns[field]).astype(str), return_inverse=True)
+            one_hot = np.zeros((codes.size, codes.max() + 1))
+            one_hot[np.arange(codes.size), codes] = ITEM_BLOCK_WEIGHTS[field]
+            blocks.append(one_hot)
+
+    emb = np.hstack(blocks).astype(np.float32)
+    norms = np.linalg.norm(emb, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(emb / norms)
+
+
+# Top-k tetangga (cosine) untuk baris [start, stop). Kolom juga diproses per blok dan top-k
+# di-merge bertahap, jadi memori puncak ~ block_size^2 float32, bukan n^2.
+# Setelah top-k awal terisi, skor ke-k per baris jadi threshold: blok berikutnya cukup
+# dibandingkan (murah), hanya kandidat di atas threshold yang ikut di-merge.
+def neighbor_block(emb, start, stop, k, block_size=SIMILAR_BLOCK_SIZE):
+    n = emb.shape[0]
+    rows = emb[start:stop]
+    local = np.arange(stop - start)
+    best_score = np.empty((stop - start, 0), dtype=np.float32)
+    best_idx = np.empty((stop - start, 0), dtype=np.int64)
+    for c_start in range(0, n, block_size):
+        c_stop = min(c_start + block_size, n)
+        sims = rows @ emb[c_start:c_stop].T
+        # Produk itu sendiri bukan tetangga
+        self_cols = local + start - c_start
+        mask = (self_cols >= 0) & (self_cols < c_stop - c_start)
+        sims[local[mask], self_cols[mask]] = -np.inf
+
+        if best_score.shape[1] < k:
+            # Top-k belum penuh: gabung semua lalu partisi
+            cand_score = np.concatenate([best_score, sims], axis=1)
+            cand_idx = np.concatenate([best_idx, np.broadcast_to(np.arange(c_start, c_stop), sims.shape)], axis=1)
+            if cand_score.shape[1] > k:
+                part = np.argpartition(cand_score, cand_score.shape[1] - k, axis=1)[:, -k:]
+                cand_score = np.take_along_axis(cand_score, part, axis=1)
+                cand_idx = np.take_along_axis(cand_idx, part, axis=1)
+            best_score, best_idx = cand_score, cand_idx
+            continue
+
+        hit_rows, hit_cols = np.divmod(np.flatnonzero(sims > best_score.min(axis=1)[:, None]), sims.shape[1])
+        if hit_rows.size == 0:
+            continue
+        # Merge: top-k lama + kandidat baru, urut per (baris, skor desc), ambil k pertama per baris
+        r = np.concatenate([np.repeat(local, k), hit_rows])
+        sc = np.concatenate([best_score.ravel(), sims[hit_rows, hit_cols]])
+        ix = np.concatenate([best_idx.ravel(), hit_cols + c_start])
+        order = np.lexsort((-sc, r))
+        r, sc, ix = r[order], sc[order], ix[order]
+        keep = np.arange(r.size) - np.searchsorted(r, local)[r] < k
+        best_score = sc[keep].reshape(-1, k)
+        best_idx = ix[keep].reshape(-1, k)
+
+    order = np.argsort(-best_score, axis=1, kind="stable")
+    return (np.take_along_axis(best_idx, order, axis=1).astype(np.int32),
+            np.take_along_axis(best_score, order, axis=1).astype(np.float32))
+
+
+# Tabel tetangga lengkap (satu proses). Trainer memparalelkan neighbor_block per blok baris.
+def build_neighbor_table(emb, k=SIMILAR_TOP_K, block_size=SIMILAR_BLOCK_SIZE):
+    n = emb.shape[0]
+    k = max(0, min(k, n - 1))
+    neighbors = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return neighbors, scores
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        neighbors[start:stop], scores[start:stop] = neighbor_block(emb, start, stop, k, block_size)
+    return neighbors, scores
+
+
+# Vektor produk L2-normalized (float32) + secondary index baris per category / tier /
+# (category, tier). Dipakai ProductIndex dan exporter artefak array (app/services/artifacts.py).
+def prepare_index(artifact):
+    vectors = np.asarray(artifact["vectors"], dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors = np.ascontiguousarray(vectors / norms)
+
+    columns = {f: np.asarray(artifact[f]) for f in RECORD_FIELDS if f in artifact}
+    subsets = {}
+    category = columns.get("category")
+    tier = columns.get("tier")
+    categories = [str(c) for c in np.unique(category)] if category is not None else []
+    tiers = [str(t) for t in np.unique(tier)] if tier is not None else []
+    for c in categories:
+        subsets[(c, None)] = np.flatnonzero(category == c)
+    for t in tiers:
+        subsets[(None, t)] = np.flatnonzero(tier == t)
+        for c in categories:
+            subsets[(c, t)] = np.flatnonzero((category == c) & (tier == t))
+    return vectors, columns, subsets
+
+
+# Retrieval engine online: matrix produk (sudah L2-normalized) di memori, tiap request
+# di-rank penuh terhadap profil user sendiri lalu diambil top-K pakai argpartition.
+class ProductIndex:
+    def __init__(self, artifact):
+        vectors, columns, subsets = prepare_index(artifact)
+        self._init(
+            vectors, artifact.get("user_feature_idx", USER_FEATURE_IDX),
+            artifact["user_min"], artifact["user_range"], columns, subsets,
+            artifact.get("neighbors"), artifact.get("neighbor_scores")
+        )
+
+    # Dari array yang sudah disiapkan (mis. memory-mapped read-only), tanpa copy
+    @classmethod
+    def from_arrays(cls, vectors, user_feature_idx, user_min, user_range, columns, subsets, neighbors=None, neighbor_scores=None):
+        index = cls.__new__(cls)
+        index._init(vectors, user_feature_idx, user_min, user_range, columns, subsets, neighbors, neighbor_scores)
+        return index
+
+    def _init(self, vectors, user_feature_idx, user_min, user_range, columns, subsets, neighbors=None, neighbor_scores=None):
+        self.vectors = vectors
+        self.size = vectors.shape[0]
+        self.user_feature_idx = list(user_feature_idx)
+        self.user_min = np.asarray(user_min, dtype=np.float64)
+        self.user_range = np.asarray(user_range, dtype=np.float64)
+        self.columns = columns
+        self._subsets = subsets
+        # Tabel tetangga precomputed (opsional, artefak lama tidak punya)
+        self.neighbors = neighbors
+        self.neighbor_scores = neighbor_scores
+        product_ids = columns.get("product_id")
+        self._row_of = {int(pid): i for i, pid in enumerate(product_ids.tolist())} if product_ids is not None else {}
+
+    @property
+    def has_neighbors(self):
+        return self.neighbors is not None and self.neighbors.shape[1] > 0
+
+    def row_of(self, product_id):
+        return self._row_of.get(int(product_id))
+
+    # Lookup O(1): baris produk -> slice tabel tetangga, tanpa hitung similarity saat request
+    def similar(self, row, k=10):
+        k = max(0, min(k, self.neighbors.shape[1]))
+        return self.neighbors[row, :k], self.neighbor_scores[row, :k]
+
+    def record(self, row):
+        return {f: col[row].item() if hasattr(col[row], "item") else col[row] for f, col in self.columns.items()}
+
+    # Profil user (Z-score 8 fitur) -> vektor unit di ruang produk
+    def user_vector(self, z):
+        u = (np.asarray(z, dtype=np.float64)[self.user_feature_idx] - self.user_min) / self.user_range
+        u = np.clip(u, 0.0, 1.0)
+        norm = np.linalg.norm(u)
+        if norm < 1e-12:
+            u = np.ones_like(u)
+            norm = np.linalg.norm(u)
+        return (u / norm).astype(np.float32)
+
+    def top_k(self, z, k=6, category=None, tier=None):
+        if category is None and tier is None:
+            rows = None
+            vectors = self.vectors
+        else:
+            rows = self._subsets.get((category, tier))
+            if rows is None or rows.size == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            vectors = self.vectors[rows]
+
+        scores = vectors @ self.user_vector(z)
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        idx = rows[top] if rows is not None else top
+        return idx, scores[top]
+
+    def records(self, idx, scores, reason):
+        recs = []
+        for i, score in zip(idx, scores):
+            rec = self.record(i)
+            rec["score"] = round(float(score), 4)
+            rec["reason"] = reason
+            recs.append(rec)
+        return recs
@@ -0,0 +1,154 @@
+import numpy as np
+
+# Urutan kolom input (sama dengan PredictionRequest) dan kolom model (sama dengan training)
+RAW_COLS = ["Recency", "Frequency", "Monetary", "Avg_Items", "Unique_Products", "Wishlist_Count", "Add_to_Cart_Count", "Page_Views"]
+USE_COLS = ["Recency", "Frequency", "Monetary_Log", "Avg_Items", "Unique_Products", "Wishlist_Count", "Add_to_Cart_Count", "Page_Views"]
+MONETARY_IDX = 2
+
+DEFAULT_CLUSTER_NAMES = ["Newbie", "Window Shopper", "Loyalist", "Sultan"]
+DRIVER_THRESHOLD = 0.6
+TOP_DRIVERS = 3
+
+
+# Raw request items -> (n, 8) float matrix with Monetary already log1p'd.
+def build_feature_matrix(items):
+    X = np.array([[getattr(item, c) for c in RAW_COLS] for item in items], dtype=np.float64)
+    X[:, MONETARY_IDX] = np.log1p(X[:, MONETARY_IDX])
+    return X
+
+
+# Scale, assign and rank drivers for a whole batch in one pass.
+def score_batch(mean, scale, centroids, X):
+    return score_scaled(centroids, (X - mean) / scale)
+
+
+# Assign + driver ranking untuk Z-score yang sudah di-scale.
+def score_scaled(centroids, Z):
+    # Jarak ke semua centroid: (n, k)
+    diff = Z[:, None, :] - centroids[None, :, :]
+    dist = np.sqrt(np.einsum("nkd,nkd->nk", diff, diff))
+
+    rows = np.arange(Z.shape[0])
+    order = np.argsort(dist, axis=1, kind="stable")
+    cluster = order[:, 0]
+    nearest = dist[rows, cluster]
+    if dist.shape[1] > 1:
+        second = order[:, 1]
+        second_dist = dist[rows, second]
+    else:
+        second = np.full_like(cluster, -1)
+        second_dist = nearest + 1
+
+    margin = second_dist - nearest
+    confidence = np.clip(50 + margin * 40, 50.0, 99.9)
+
+    # Driver = fitur dengan |Z| paling menonjol, urut impact terbesar
+    impact = np.abs(Z)
+    driver_idx = np.argsort(-impact, axis=1, kind="stable")[:, :TOP_DRIVERS]
+    driver_ok = impact[rows[:, None], driver_idx] >= DRIVER_THRESHOLD
+
+    return {
+        "Z": Z,
+        "cluster": cluster,
+        "second": second,
+        "nearest": nearest,
+        "margin": margin,
+        "confidence": confidence,
+        "driver_idx": driver_idx,
+        "driver_ok": driver_ok,
+    }
+
+
+# Assemble the /recommend/user response body for row ``i`` of a scored batch.
+def build_result(scored, i, monetary, page_views, recency, meta, recs):
+    readable_cols = meta.get("feature_readable", USE_COLS)
+    cluster_names = meta.get("cluster_names", DEFAULT_CLUSTER_NAMES)
+
+    cluster = int(scored["cluster"][i])
+    z_scores = scored["Z"][i]
+
+    top_drivers = []
+    for j, ok in zip(scored["driver_idx"][i], scored["driver_ok"][i]):
+        if not ok:
+            break
+        score = float(z_scores[j])
+        top_drivers.append({
+            "feature": readable_cols[j] if j < len(readable_cols) else USE_COLS[j],
+            "score": round(score, 2),
+            "description": "High" if score > 0 else "Low",
+            "sentiment": "positive" if score > 0 else "negative",
+            "impact": abs(score)
+        })
+
+    current_name = cluster_names[cluster]
+    why_text = f"User fits the {current_name} profile."
+    if top_drivers:
+        why_text = f"Classified as {current_name} mainly due to {top_drivers[0]['description']} {top_drivers[0]['feature']}."
+
+    margin = float(scored["margin"][i])
+    compare_text = "Distinct behavior pattern."
+    second = int(scored["second"][i])
+    if second >= 0:
+        compare_text = f"Close to {cluster_names[second]} profile (Margin: {round(margin, 2)})."
+
+    anomaly_text = "Behavior is consistent."
+    if monetary > 1000 and page_views < 5:
+        anomaly_text = "Action: Impulsive Buyer! Show 'Buy Now' buttons prominently."
+    elif recency > 60 and cluster == 3:
+        anomaly_text = "URGENT: VIP Churn Risk. Trigger personal assistance."
+
+    return {
+        "cluster": cluster,
+        "metrics": {
+            "confidence_score": round(float(scored["confidence"][i]), 1),
+            "distance_to_centroid": round(float(scored["nearest"][i]), 4),
+            "feature_drivers": top_drivers,
+            "explanations": {
+                "why": why_text,
+                "compare": compare_text,
+                "anomaly": anomaly_text
+            }
+        },
+        "recommendations": recs
+    }
+
+
+# Model yang sudah "dikompilasi": mean/scale & centroid disimpan sebagai array contiguous,
+# jadi scoring cukup pakai NumPy tanpa DataFrame dan tanpa validasi sklearn.
+class CompiledScorer:
+    def __init__(self, mean, scale, centroids):
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float64)
+        self.n_clusters = self.centroids.shape[0]
+
+    @classmethod
+    def from_sklearn(cls, scaler, kmeans):
+        return cls(scaler.mean_, scaler.scale_, kmeans.cluster_centers_)
+
+    # Raw feature tuple (urutan RAW_COLS) -> vektor fitur model
+    def vectorize(self, raw):
+        x = np.array(raw, dtype=np.float64)
+        x[MONETARY_IDX] = np.log1p(x[MONETARY_IDX])
+        return x
+
+    def transform(self, X):
+        return (X - self.mean) / self.scale
+
+    def predict_one(self, raw):
+        z = self.transform(self.vectorize(raw))
+        diff = self.centroids - z
+        return int(np.argmin(np.einsum("kd,kd->k", diff, diff)))
+
+    def score_one(self, raw):
+        return self.score_batch(self.vectorize(raw)[None, :])
+
+    def score_batch(self, X):
+        return score_batch(self.mean, self.scale, self.centroids, X)
+
+    def score_scaled(self, Z):
+        return score_scaled(self.centroids, Z)
+
+
+def request_features(data):
+    return tuple(getattr(data, c) for c in RAW_COLS)
@@ -0,0 +1,131 @@
+import numpy as np
+from sqlalchemy import select, update, bindparam
+from app.models.user import User
+from app.services.scoring import RAW_COLS, MONETARY_IDX
+
+# Kolom tabel users untuk 8 fitur input model (urutan RAW_COLS)
+FEATURE_COLUMNS = [getattr(User.__table__.c, c.lower()) for c in RAW_COLS]
+
+_FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+_FNV_PRIME = np.uint64(0x100000001b3)
+
+
+# Hash 64-bit per baris atas nilai fitur mentah (FNV-1a per kolom float64), vectorized.
+# Disimpan sebagai BIGINT signed, jadi hasilnya di-view ke int64.
+def feature_hash(raw):
+    bits = np.ascontiguousarray(raw, dtype=np.float64) + 0.0  # -0.0 -> 0.0
+    bits = bits.view(np.uint64)
+    h = np.full(bits.shape[0], _FNV_OFFSET, dtype=np.uint64)
+    for j in range(bits.shape[1]):
+        h ^= bits[:, j]
+        h *= _FNV_PRIME
+    return h.view(np.int64)
+
+
+def _user_query():
+    table = User.__table__
+    return select(
+        table.c.user_id, *FEATURE_COLUMNS,
+        table.c.cluster_id, table.c.cluster_model_version, table.c.features_hash
+    )
+
+
+# Stream users terurut user_id per chunk. Dialect dengan server-side cursor (PostgreSQL)
+# pakai satu cursor; SQLite pakai keyset (user_id > last) supaya writer tidak ke-lock.
+def iter_user_chunks(engine, chunk_size, start_after=None):
+    table = User.__table__
+    query = _user_query().order_by(table.c.user_id)
+
+    if engine.dialect.supports_server_side_cursors:
+        if start_after is not None:
+            query = query.where(table.c.user_id > start_after)
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, max_row_buffer=chunk_size).execute(query)
+            for rows in result.partitions(chunk_size):
+                yield rows
+        return
+
+    last = start_after
+    while True:
+        page = query if last is None else query.where(table.c.user_id > last)
+        with engine.connect() as conn:
+            rows = conn.execute(page.limit(chunk_size)).all()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+# Hitung cluster satu chunk. Return hanya baris yang perlu ditulis: cluster belum ada,
+# versi model berbeda, atau fitur berubah sejak scoring terakhir.
+def score_chunk(rows, scorer, model_version, force=False):
+    if not rows:
+        return []
+    # Row -> kolom (zip jauh lebih cepat daripada np.array atas objek Row)
+    cols = list(zip(*rows))
+    user_ids = np.array(cols[0], dtype=np.int64)
+    raw = np.array(cols[1:1 + len(RAW_COLS)], dtype=np.float64).T
+    raw = np.nan_to_num(raw, nan=0.0)  # fitur NULL = default kolom (0)
+    hashes = feature_hash(raw)
+
+    if force:
+        stale = np.ones(len(rows), dtype=bool)
+    else:
+        old_cluster, old_version, old_hash = cols[-3], cols[-2], cols[-1]
+        stale = np.fromiter(
+            (c is None or v != model_version or h is None for c, v, h in zip(old_cluster, old_version, old_hash)),
+            dtype=bool, count=len(rows)
+        )
+        known = np.array([h if h is not None else 0 for h in old_hash], dtype=np.int64)
+        stale |= known != hashes
+    if not stale.any():
+        return []
+
+    X = raw[stale]
+    X[:, MONETARY_IDX] = np.log1p(X[:, MONETARY_IDX])
+    Z = scorer.transform(X)
+    dist = ((Z[:, None, :] - scorer.centroids[None, :, :]) ** 2).sum(axis=2)
+    clusters = dist.argmin(axis=1)
+
+    return [
+        {"uid": int(uid), "cid": int(c), "ver": model_version, "fhash": int(h)}
+        for uid, c, h in zip(user_ids[stale], clusters, hashes[stale])
+    ]
+
+
+def _bulk_update_postgresql(conn, updates):
+    from psycopg2.extras import execute_values
+    cursor = conn.connection.cursor()
+    try:
+        execute_values(
+            cursor,
+            "UPDATE users AS u SET cluster_id = v.cluster_id, cluster_model_version = v.ver, "
+            "features_hash = v.h FROM (VALUES %s) AS v(user_id, cluster_id, ver, h) "
+            "WHERE u.user_id = v.user_id",
+            [(u["uid"], u["cid"], u["ver"], u["fhash"]) for u in updates],
+            page_size=10_000
+        )
+    finally:
+        cursor.close()
+
+
+# Bulk UPDATE satu chunk dalam satu transaksi (commit per chunk -> job bisa dilanjutkan)
+def write_assignments(engine, updates):
+    if not updates:
+        return 0
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            _bulk_update_postgresql(conn, updates)
+        else:
+            table = User.__table__
+            stmt = (
+                update(table)
+                .where(table.c.user_id == bindparam("uid"))
+                .values(
+                    cluster_id=bindparam("cid"),
+                    cluster_model_version=bindparam("ver"),
+                    features_hash=bindparam("fhash")
+                )
+            )
+            conn.execute(stmt, updates)
+    return len(updates)
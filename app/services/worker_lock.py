@@ -0,0 +1,95 @@
+import hashlib
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from sqlalchemy import text
+from app.database import engine
+
+try:
+    import fcntl
+except ImportError:  # Windows dev: tanpa flock, anggap satu proses
+    fcntl = None
+
+
+# Lock antar worker uvicorn (proses terpisah) untuk pekerjaan yang cuma boleh jalan di satu tempat:
+# PostgreSQL -> session advisory lock (berlaku lintas mesin), dialect lain (SQLite = satu mesin)
+# -> flock di file lock per database. Dua-duanya otomatis lepas kalau prosesnya mati.
+class WorkerLock:
+    def __init__(self, name, bind=engine):
+        self.name = name
+        self.bind = bind
+        self._key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+        self._conn = None
+        self._file = None
+        self._mutex = threading.Lock()
+
+    @property
+    def held(self):
+        return self._conn is not None or self._file is not None
+
+    def acquire(self, blocking=True):
+        with self._mutex:
+            if self.held:
+                return True
+            if self.bind.dialect.name == "postgresql":
+                return self._acquire_pg(blocking)
+            return self._acquire_file(blocking)
+
+    def release(self):
+        with self._mutex:
+            if self._conn is not None:
+                try:
+                    self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._key})
+                    self._conn.commit()
+                    self._conn.close()
+                except Exception:
+                    # Koneksi bermasalah: buang koneksi fisiknya (lock ikut lepas), jangan balik ke pool
+                    self._conn.invalidate()
+                self._conn = None
+            if self._file is not None:
+                if fcntl is not None:
+                    fcntl.flock(self._file, fcntl.LOCK_UN)
+                self._file.close()
+                self._file = None
+
+    @contextmanager
+    def hold(self):
+        self.acquire(blocking=True)
+        try:
+            yield
+        finally:
+            self.release()
+
+    # Koneksi dipegang selama lock dipegang (advisory lock terikat ke session)
+    def _acquire_pg(self, blocking):
+        conn = self.bind.connect()
+        try:
+            if blocking:
+                conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": self._key})
+                acquired = True
+            else:
+                acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self._key}).scalar()
+            conn.commit()
+        except Exception:
+            conn.invalidate()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def _acquire_file(self, blocking):
+        if fcntl is None:
+            self._file = open(os.devnull, "w")
+            return True
+        url_hash = hashlib.sha256(str(self.bind.url).encode()).hexdigest()[:12]
+        f = open(os.path.join(tempfile.gettempdir(), f"recsys-{self.name}-{url_hash}.lock"), "a+")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return False
+        self._file = f
+        return True
@@ -3,11 +3,19 @@ import numpy as np
 import random
 from faker import Faker
 import os
+import sys
+import time
+import argparse
+from multiprocessing import Pool
 
 fake = Faker()
 
 NUM_USERS = 1000 
 NUM_PRODUCTS = 100
+USER_COLUMNS = [
+    "user_id", "Recency", "Frequency", "Monetary", "Avg_Items", "Unique_Products",
+    "Wishlist_Count", "Add_to_Cart_Count", "Page_Views"
+]
 
 REAL_PRODUCTS = {
     "Electronics": {
@@ -43,73 +51,184 @@ TIER_PRICING = {
     "Luxury": (1000, 5000)
 }
 
-products = []
-categories = list(REAL_PRODUCTS.keys())
-
-for i in range(NUM_PRODUCTS):
-    cat = random.choice(categories)
-    tier_name = random.choices(["Budget", "Standard", "Premium", "Luxury"], weights=[40, 30, 20, 10], k=1)[0]
-    
-    prod_name = random.choice(REAL_PRODUCTS[cat][tier_name])
-    price_range = TIER_PRICING[tier_name]
-    price = random.randint(*price_range)
-    
-    final_name = f"{prod_name}" if random.random() > 0.5 else f"{prod_name} - {fake.word().capitalize()} Edition"
-    
-    complexity = (price / 5000) * 10 
-    
-    products.append({
-        "product_id": i + 100,
-        "name": final_name,
-        "category": cat,
-        "price": price,
-        "tier": tier_name,
-        "complexity_score": round(complexity, 2),
-        "popularity_score": random.uniform(0, 10)
-    })
-
-df_products = pd.DataFrame(products)
-
-data = []
-for i in range(NUM_USERS):
-    mode = i % 4 
-    if mode == 0: 
-        recency = random.randint(30, 90)
-        freq = random.randint(1, 3)
-        monetary = random.randint(10, 50)
-        views = random.randint(1, 10)
-    elif mode == 1: 
-        recency = random.randint(7, 30)
-        freq = random.randint(3, 8)
-        monetary = random.randint(60, 200)
-        views = random.randint(50, 150)
-    elif mode == 2: 
-        recency = random.randint(1, 14)
-        freq = random.randint(15, 40)
-        monetary = random.randint(300, 1500)
-        views = random.randint(20, 60)
-    else: 
-        recency = random.randint(1, 7)
-        freq = random.randint(10, 50)
-        monetary = random.randint(3000, 10000)
-        views = random.randint(30, 100)
-
-    data.append({
-        "user_id": i + 1, 
-        "Recency": recency, 
-        "Frequency": freq, 
+
+# Persona user (mode = index % 4): rentang inklusif (low, high) untuk
+# Recency, Frequency, Monetary, Page_Views -> sama dengan loop generate_users_loop
+PERSONAS = np.array([
+    # Recency,  Frequency,  Monetary,     Page_Views
+    [[30, 90],  [1, 3],     [10, 50],     [1, 10]],
+    [[7, 30],   [3, 8],     [60, 200],    [50, 150]],
+    [[1, 14],   [15, 40],   [300, 1500],  [20, 60]],
+    [[1, 7],    [10, 50],   [3000, 10000], [30, 100]]
+])
+
+
+def generate_products():
+    products = []
+    categories = list(REAL_PRODUCTS.keys())
+
+    for i in range(NUM_PRODUCTS):
+        cat = random.choice(categories)
+        tier_name = random.choices(["Budget", "Standard", "Premium", "Luxury"], weights=[40, 30, 20, 10], k=1)[0]
+        
+        prod_name = random.choice(REAL_PRODUCTS[cat][tier_name])
+        price_range = TIER_PRICING[tier_name]
+        price = random.randint(*price_range)
+        
+        final_name = f"{prod_name}" if random.random() > 0.5 else f"{prod_name} - {fake.word().capitalize()} Edition"
+        
+        complexity = (price / 5000) * 10 
+        
+        products.append({
+            "product_id": i + 100,
+            "name": final_name,
+            "category": cat,
+            "price": price,
+            "tier": tier_name,
+            "complexity_score": round(complexity, 2),
+            "popularity_score": random.uniform(0, 10)
+        })
+
+    return pd.DataFrame(products)
+
+
+def generate_users_loop(num_users):
+    data = []
+    for i in range(num_users):
+        mode = i % 4 
+        if mode == 0: 
+            recency = random.randint(30, 90)
+            freq = random.randint(1, 3)
+            monetary = random.randint(10, 50)
+            views = random.randint(1, 10)
+        elif mode == 1: 
+            recency = random.randint(7, 30)
+            freq = random.randint(3, 8)
+            monetary = random.randint(60, 200)
+            views = random.randint(50, 150)
+        elif mode == 2: 
+            recency = random.randint(1, 14)
+            freq = random.randint(15, 40)
+            monetary = random.randint(300, 1500)
+            views = random.randint(20, 60)
+        else: 
+            recency = random.randint(1, 7)
+            freq = random.randint(10, 50)
+            monetary = random.randint(3000, 10000)
+            views = random.randint(30, 100)
+
+        data.append({
+            "user_id": i + 1, 
+            "Recency": recency, 
+            "Frequency": freq, 
+            "Monetary": monetary,
+            "Avg_Items": round(random.uniform(1, 5), 1), 
+            "Unique_Products": random.randint(1, freq) if freq > 0 else 0,
+            "Wishlist_Count": random.randint(0, 10), 
+            "Add_to_Cart_Count": freq + random.randint(0, 5), 
+            "Page_Views": views
+        })
+
+    return pd.DataFrame(data)
+
+
+# Versi vectorized: satu chunk user [start, start + size) dalam beberapa draw NumPy.
+# RNG per chunk = default_rng([seed, chunk_idx]) -> output sama berapa pun jumlah worker.
+def generate_users_chunk(args):
+    chunk_idx, start, size, seed = args
+    rng = np.random.default_rng([seed, chunk_idx])
+
+    user_id = np.arange(start, start + size, dtype=np.int64) + 1
+    bounds = PERSONAS[(user_id - 1) % 4]
+    low, high = bounds[:, :, 0], bounds[:, :, 1] + 1
+    recency, freq, monetary, views = rng.integers(low, high).T
+
+    return pd.DataFrame({
+        "user_id": user_id,
+        "Recency": recency,
+        "Frequency": freq,
         "Monetary": monetary,
-        "Avg_Items": round(random.uniform(1, 5), 1), 
-        "Unique_Products": random.randint(1, freq) if freq > 0 else 0,
-        "Wishlist_Count": random.randint(0, 10), 
-        "Add_to_Cart_Count": freq + random.randint(0, 5), 
+        "Avg_Items": np.round(rng.uniform(1, 5, size), 1),
+        "Unique_Products": rng.integers(1, freq + 1),
+        "Wishlist_Count": rng.integers(0, 11, size),
+        "Add_to_Cart_Count": freq + rng.integers(0, 6, size),
         "Page_Views": views
-    })
+    }, columns=USER_COLUMNS)
+
+
+def iter_user_chunks(num_users, chunk_size, seed, workers):
+    tasks = [
+        (i, start, min(chunk_size, num_users - start), seed)
+        for i, start in enumerate(range(0, num_users, chunk_size))
+    ]
+    if workers <= 1:
+        for task in tasks:
+            yield generate_users_chunk(task)
+        return
+    with Pool(workers) as pool:
+        # imap menjaga urutan chunk, jadi file output tetap urut user_id
+        yield from pool.imap(generate_users_chunk, tasks)
+
+
+# Tulis chunk satu per satu (CSV append / Parquet row group), memori = 1 chunk per worker
+def write_user_chunks(chunks, path, fmt):
+    tmp_path = f"{path}.tmp"
+    rows = 0
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Format parquet butuh pyarrow (pip install pyarrow)")
+        writer = None
+        for df in chunks:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table)
+            rows += len(df)
+        if writer is not None:
+            writer.close()
+    else:
+        with open(tmp_path, "w", newline="") as f:
+            for i, df in enumerate(chunks):
+                df.to_csv(f, index=False, header=(i == 0))
+                rows += len(df)
+    os.replace(tmp_path, path)
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate dummy users & products")
+    parser.add_argument("--users", type=int, default=NUM_USERS)
+    parser.add_argument("--vectorized", action="store_true", help="Generator NumPy per chunk (untuk dataset besar)")
+    parser.add_argument("--chunk-size", type=int, default=500_000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--output", default=None, help="Default: app/ml/dummy_ecommerce_clustered.<format>")
+    parser.add_argument("--skip-products", action="store_true", help="Jangan tulis ulang products_dummy.csv")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.makedirs("app/ml", exist_ok=True)
+    output = args.output or f"app/ml/dummy_ecommerce_clustered.{args.format}"
 
-df_users = pd.DataFrame(data)
+    t0 = time.perf_counter()
+    if args.vectorized:
+        chunks = iter_user_chunks(args.users, args.chunk_size, args.seed, args.workers)
+        rows = write_user_chunks(chunks, output, args.format)
+    else:
+        df_users = generate_users_loop(args.users)
+        write_user_chunks([df_users], output, args.format)
+        rows = len(df_users)
+    elapsed = time.perf_counter() - t0
+    print(f"Users: {rows} rows -> {output} ({elapsed:.2f}s, {rows / elapsed:,.0f} rows/s)")
 
-os.makedirs("app/ml", exist_ok=True)
-df_users.to_csv("app/ml/dummy_ecommerce_clustered.csv", index=False)
-df_products.to_csv("app/ml/products_dummy.csv", index=False)
+    if not args.skip_products:
+        df_products = generate_products()
+        df_products.to_csv("app/ml/products_dummy.csv", index=False)
 
-print("Real Product Data Generated")
\ No newline at end of file
+    print("Real Product Data Generated")
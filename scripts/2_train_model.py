@@ -3,132 +3,548 @@ import numpy as np
 import joblib
 import json
 import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score, silhouette_samples
+from sklearn.metrics import silhouette_samples
 from sklearn.metrics.pairwise import cosine_similarity
 
-BASE_DIR = "app/ml"
-os.makedirs(BASE_DIR, exist_ok=True)
-
-df = pd.read_csv(f"{BASE_DIR}/dummy_ecommerce_clustered.csv")
-df_prods = pd.read_csv(f"{BASE_DIR}/products_dummy.csv")
+sys.path.append(os.getcwd())
 
-if "product_name" in df_prods.columns:
-    df_prods = df_prods.rename(columns={"product_name": "name"})
+from app.services.retrieval import build_product_index, build_item_embedding, neighbor_block, SIMILAR_TOP_K, SIMILAR_BLOCK_SIZE
+from app.services.artifacts import export_arrays
+from app.services.drift import reference_histograms
 
-df["Monetary_Log"] = np.log1p(df["Monetary"])
+BASE_DIR = "app/ml"
+os.makedirs(BASE_DIR, exist_ok=True)
 
 features = [
     "Recency", "Frequency", "Monetary_Log", "Avg_Items",
     "Unique_Products", "Wishlist_Count", "Add_to_Cart_Count", "Page_Views"
 ]
 feature_readable = ["Recency", "Frequency", "Monetary", "Avg Items", "Unique Prod", "Wishlist", "Add Cart", "Views"]
+cluster_names = ["Newbie", "Window Shopper", "Loyalist", "Sultan"]
+N_CLUSTERS = 4
+MONETARY_LOG_IDX = features.index("Monetary_Log")
+ELBOW_KS = range(2, 10)
+RANDOM_STATE = 42
 
-X = df[features]
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
 
-pca = PCA(n_components=2)
-X_pca = pca.fit_transform(X_scaled)
-pca_var = [round(v * 100, 2) for v in pca.explained_variance_ratio_]
+def load_products():
+    df_prods = pd.read_csv(f"{BASE_DIR}/products_dummy.csv")
+    if "product_name" in df_prods.columns:
+        df_prods = df_prods.rename(columns={"product_name": "name"})
+    return df_prods
 
-elbow_curve = {}
-for k in range(2, 10):
-    km = KMeans(n_clusters=k, random_state=42, n_init=10)
-    km.fit(X_scaled)
-    elbow_curve[str(k)] = round(km.inertia_, 2)
 
-kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-clusters = kmeans.fit_predict(X_scaled)
+# Data user: CSV atau Parquet (1_generate_data.py --format parquet), dipilih dari ekstensi file
+def _require_pyarrow():
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        sys.exit("Input parquet butuh pyarrow (pip install pyarrow)")
+    return pq
 
-df["Temp"] = clusters
-means = df.groupby("Temp")["Monetary_Log"].mean().sort_values()
-mapping = {old: new for new, old in enumerate(means.index)}
+def read_users(input_path):
+    if input_path.endswith(".parquet"):
+        return _require_pyarrow().read_table(input_path).to_pandas()
+    return pd.read_csv(input_path)
 
-sorted_centers = np.zeros_like(kmeans.cluster_centers_)
-for old, new in mapping.items():
-    sorted_centers[new] = kmeans.cluster_centers_[old]
+def read_user_chunks(input_path, chunk_size):
+    if input_path.endswith(".parquet"):
+        for batch in _require_pyarrow().ParquetFile(input_path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(input_path, chunksize=chunk_size)
 
-kmeans_final = KMeans(n_clusters=4, init=sorted_centers, n_init=1, random_state=42)
-kmeans_final.fit(X_scaled)
-final_clusters = kmeans_final.predict(X_scaled)
-df["Cluster"] = df["Temp"].map(mapping)
 
-prod_scaler = MinMaxScaler()
-prod_features = df_prods[['price', 'complexity_score']].values
-prod_vectors = prod_scaler.fit_transform(prod_features)
+def add_log_features(df):
+    df["Monetary_Log"] = np.log1p(df["Monetary"])
+    return df
 
-centroids = kmeans_final.cluster_centers_
-cluster_spending_power = centroids[:, [2, 3]] 
-cluster_vectors = prod_scaler.fit_transform(cluster_spending_power) 
 
-similarity_matrix = cosine_similarity(cluster_vectors, prod_vectors)
+# ---------------------------------------------------------------------------
+# Elbow sweep paralel: tiap (k, restart) = 1 task KMeans(n_init=1) di process pool.
+# Seed restart diturunkan dari RANDOM_STATE, jadi hasil sama berapa pun jumlah worker.
+# ---------------------------------------------------------------------------
+_SWEEP_X = None
 
-recommendations = {}
-cluster_names = ["Newbie", "Window Shopper", "Loyalist", "Sultan"]
+def _init_sweep_worker(X):
+    global _SWEEP_X
+    _SWEEP_X = X
+    # 1 thread BLAS/OpenMP per proses, paralelisme dari pool (hindari oversubscription)
+    threadpool_limits(1)
+
+# Worker cuma mengembalikan centroid + inertia (k x fitur), bukan model utuh: labels_
+# sepanjang n tidak ikut di-pickle balik ke parent
+def _fit_one(task):
+    k, seed = task
+    km = KMeans(n_clusters=k, n_init=1, random_state=seed)
+    km.fit(_SWEEP_X)
+    return k, seed, km.inertia_, km.cluster_centers_
+
+# Hasil: {k: (inertia, seed, centers)} restart terbaik per k
+def elbow_sweep(X, ks=ELBOW_KS, n_init=10, jobs=None):
+    seeds = [int(s) for s in np.random.SeedSequence(RANDOM_STATE).generate_state(n_init)]
+    tasks = [(k, seed) for k in ks for seed in seeds]
+    jobs = jobs or os.cpu_count() or 1
+
+    # Reduce begitu hasil datang: inertia terkecil, seri -> urutan seed (deterministik)
+    best = {}
+    def keep(result):
+        k, seed, inertia, centers = result
+        if k not in best or (inertia, seeds.index(seed)) < (best[k][0], seeds.index(best[k][1])):
+            best[k] = (inertia, seed, centers)
+
+    if jobs == 1:
+        _init_sweep_worker(X)
+        for t in tasks:
+            keep(_fit_one(t))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_sweep_worker, initargs=(X,)) as pool:
+            for future in as_completed([pool.submit(_fit_one, t) for t in tasks]):
+                keep(future.result())
+    return best
+
+# Model final = fit ulang k terpilih dengan seed pemenang sweep (1 fit, bukan k x n_init);
+# 1 thread seperti di worker supaya hasilnya identik dengan restart yang menang
+def fit_best(X, sweep, k=N_CLUSTERS):
+    _, seed, _ = sweep[k]
+    with threadpool_limits(1):
+        return KMeans(n_clusters=k, n_init=1, random_state=seed).fit(X)
+
+# Urutkan cluster berdasarkan Monetary_Log (Newbie -> Sultan) tanpa refit:
+# permutasi centroid & label model final
+def relabel_by_monetary(km):
+    order = np.argsort(km.cluster_centers_[:, MONETARY_LOG_IDX])
+    km.cluster_centers_ = km.cluster_centers_[order]
+    if hasattr(km, "labels_"):
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(order.shape[0])
+        km.labels_ = inverse[km.labels_]
+    return km
+
+
+# ---------------------------------------------------------------------------
+# Silhouette O(n^2) hanya di stratified sample (proporsional per cluster), diulang
+# beberapa kali -> mean + 95% CI. Memori tetap ~sample_size^2, bukan n^2.
+# ---------------------------------------------------------------------------
+def stratified_sample(labels, size, rng):
+    n = labels.shape[0]
+    if n <= size:
+        return np.arange(n)
+    idx = []
+    for c in np.unique(labels):
+        members = np.flatnonzero(labels == c)
+        take = min(members.shape[0], max(2, int(round(size * members.shape[0] / n))))
+        idx.append(rng.choice(members, take, replace=False))
+    return np.concatenate(idx)
+
+def sampled_silhouette(X, labels, sample_size=10_000, repeats=5):
+    rng = np.random.default_rng(RANDOM_STATE)
+    exact = X.shape[0] <= sample_size
+    repeats = 1 if exact else repeats
+
+    overall = []
+    per_cluster = np.full((repeats, N_CLUSTERS), np.nan)
+    for r in range(repeats):
+        idx = stratified_sample(labels, sample_size, rng)
+        sil = silhouette_samples(X[idx], labels[idx])
+        overall.append(sil.mean())
+        for c in range(N_CLUSTERS):
+            mask = labels[idx] == c
+            if mask.any():
+                per_cluster[r, c] = sil[mask].mean()
+
+    overall = np.asarray(overall)
+    mean = float(overall.mean())
+    half = 1.96 * overall.std(ddof=1) / np.sqrt(repeats) if repeats > 1 else 0.0
+    return {
+        "score": round(mean, 4),
+        "ci95": [round(mean - half, 4), round(mean + half, 4)],
+        "per_cluster": [round(float(v), 3) if not np.isnan(v) else 0.0 for v in np.nanmean(per_cluster, axis=0)],
+        "sample_size": int(min(sample_size, X.shape[0])),
+        "repeats": repeats,
+        "exact": exact
+    }
+
+
+# ---------------------------------------------------------------------------
+# Mode in-memory (default): seluruh file user dibaca sekaligus
+# ---------------------------------------------------------------------------
+def train_in_memory(input_path, jobs=None, sil_sample=10_000, sil_repeats=5):
+    df = add_log_features(read_users(input_path))
 
-for i in range(4):
-    top_indices = similarity_matrix[i].argsort()[-6:][::-1]
-    selected_prods = df_prods.iloc[top_indices].to_dict(orient="records")
-    for p in selected_prods:
-        p['reason'] = f"Matches {cluster_names[i]} spending profile"
-    recommendations[i] = selected_prods
-
-centroids_real = scaler.inverse_transform(kmeans_final.cluster_centers_)
-real_df = pd.DataFrame(centroids_real, columns=features)
-real_df["Monetary"] = np.expm1(real_df["Monetary_Log"]) 
-real_df = real_df.drop(columns=["Monetary_Log"])
-
-sample_indices = np.random.choice(X_scaled.shape[0], 200, replace=False)
-pca_scatter_data = []
-for i in sample_indices:
-    pca_scatter_data.append({
-        "x": round(float(X_pca[i, 0]), 2),
-        "y": round(float(X_pca[i, 1]), 2),
-        "cluster": int(final_clusters[i])
-    })
-
-corr_matrix = df[features].corr().round(2).values.tolist()
-
-sil_samples = silhouette_samples(X_scaled, final_clusters)
-sil_per_cluster = []
-for i in range(4):
-    score = sil_samples[final_clusters == i].mean()
-    sil_per_cluster.append(round(float(score), 3))
-
-feature_importance = np.abs(kmeans_final.cluster_centers_).mean(axis=0)
-feat_imp_sorted = sorted(zip(feature_readable, feature_importance), key=lambda x: x[1], reverse=True)
-
-metadata = {
-    "silhouette_score": round(silhouette_score(X_scaled, final_clusters), 4),
-    "inertia": round(kmeans_final.inertia_, 2),
-    "features": features,
-    "feature_readable": feature_readable,
-    "cluster_names": cluster_names,
-    "centroids_scaled": kmeans_final.cluster_centers_.tolist(),
-    "centroids_real": real_df.to_dict(orient="records"),
-    "cluster_counts": df["Cluster"].value_counts().sort_index().to_dict(),
-    "pca_variance": pca_var,
-    "elbow_curve": elbow_curve,
-    "global_stats": {
-        "mean": scaler.mean_.tolist(),
-        "std": scaler.scale_.tolist()
-    },
-    "advanced_viz": {
+    X = df[features]
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+
+    pca = PCA(n_components=2, random_state=RANDOM_STATE)
+    X_pca = pca.fit_transform(X_scaled)
+    pca_var = [round(v * 100, 2) for v in pca.explained_variance_ratio_]
+
+    # Sweep k=2..9 sekali (paralel); model final = restart terbaik k=N_CLUSTERS, tanpa refit
+    sweep = elbow_sweep(X_scaled, jobs=jobs)
+    elbow_curve = {str(k): round(fit[0], 2) for k, fit in sorted(sweep.items())}
+
+    kmeans_final = relabel_by_monetary(fit_best(X_scaled, sweep))
+    final_clusters = kmeans_final.labels_
+    df["Cluster"] = final_clusters
+
+    # Seeded: export ulang model yang sama harus menghasilkan versi artefak yang sama
+    rng = np.random.default_rng(RANDOM_STATE)
+    sample_indices = rng.choice(X_scaled.shape[0], min(200, X_scaled.shape[0]), replace=False)
+    pca_scatter_data = []
+    for i in sample_indices:
+        pca_scatter_data.append({
+            "x": round(float(X_pca[i, 0]), 2),
+            "y": round(float(X_pca[i, 1]), 2),
+            "cluster": int(final_clusters[i])
+        })
+
+    corr_matrix = df[features].corr().round(2).values.tolist()
+
+    silhouette = sampled_silhouette(X_scaled, final_clusters, sil_sample, sil_repeats)
+
+    return {
+        "scaler": scaler,
+        "kmeans": kmeans_final,
+        "silhouette": silhouette,
+        "inertia": round(kmeans_final.inertia_, 2),
+        "cluster_counts": df["Cluster"].value_counts().sort_index().to_dict(),
+        "pca_variance": pca_var,
+        "elbow_curve": elbow_curve,
         "pca_scatter": pca_scatter_data,
         "correlation_matrix": corr_matrix,
-        "silhouette_per_cluster": sil_per_cluster,
-        "feature_importance": {"labels": [x[0] for x in feat_imp_sorted], "data": [round(x[1],2) for x in feat_imp_sorted]}
+        "drift_reference": reference_histograms(X_scaled)
     }
-}
 
-with open(f"{BASE_DIR}/model_metrics.json", "w") as f:
-    json.dump(metadata, f)
 
-joblib.dump(scaler, f"{BASE_DIR}/scaler_preproc.joblib")
-joblib.dump(kmeans_final, f"{BASE_DIR}/kmeans_k2.joblib")
-joblib.dump(recommendations, f"{BASE_DIR}/topN_by_cluster.joblib")
+# ---------------------------------------------------------------------------
+# Mode streaming (out-of-core): file user dibaca per chunk, memori dibatasi chunk size
+# + ukuran reservoir sample, bukan jumlah user.
+# ---------------------------------------------------------------------------
+def iter_chunks(input_path, chunk_size):
+    for chunk in read_user_chunks(input_path, chunk_size):
+        yield add_log_features(chunk)[features].to_numpy(dtype=np.float64)
+
+
+# Reservoir sample uniform: tiap baris dapat random key, simpan `size` key terkecil
+class Reservoir:
+    def __init__(self, size, n_features, seed=42):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.rows = np.empty((0, n_features))
+
+    def add(self, X):
+        keys = np.concatenate([self.keys, self.rng.random(X.shape[0])])
+        rows = np.vstack([self.rows, X])
+        if keys.shape[0] > self.size:
+            keep = np.argpartition(keys, self.size - 1)[:self.size]
+            keys, rows = keys[keep], rows[keep]
+        self.keys, self.rows = keys, rows
+
+
+# Momen gabungan (n, mean, co-moment) untuk korelasi/PCA tanpa simpan data (Chan et al.)
+class RunningMoments:
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.comoment = np.zeros((n_features, n_features))
+
+    def add(self, X):
+        m = X.shape[0]
+        if m == 0:
+            return
+        chunk_mean = X.mean(axis=0)
+        centered = X - chunk_mean
+        chunk_comoment = centered.T @ centered
+        delta = chunk_mean - self.mean
+        total = self.n + m
+        self.comoment += chunk_comoment + np.outer(delta, delta) * self.n * m / total
+        self.mean += delta * m / total
+        self.n = total
+
+    def correlation(self):
+        cov = self.comoment / max(self.n - 1, 1)
+        std = np.sqrt(np.diag(cov))
+        std[std == 0] = 1.0
+        return cov / np.outer(std, std)
+
+
+def train_streaming(input_path, chunk_size, sample_size, epochs, jobs=None, sil_sample=10_000, sil_repeats=5):
+    # Pass 1: scaler (partial_fit = running mean/var), momen korelasi, reservoir sample
+    scaler = StandardScaler()
+    moments = RunningMoments(len(features))
+    reservoir = Reservoir(sample_size, len(features))
+    for X in iter_chunks(input_path, chunk_size):
+        scaler.partial_fit(X)
+        moments.add(X)
+        reservoir.add(X)
+    print(f"Pass 1: {moments.n} rows, sample {reservoir.rows.shape[0]}")
+
+    sample_scaled = scaler.transform(reservoir.rows)
+
+    # Elbow & init centroid dari sample; kurva inertia di-skala ke jumlah populasi
+    sweep = elbow_sweep(sample_scaled, jobs=jobs)
+    scale_up = moments.n / sample_scaled.shape[0]
+    elbow_curve = {str(k): round(fit[0] * scale_up, 2) for k, fit in sorted(sweep.items())}
+
+    # Urutkan cluster berdasarkan Monetary_Log (Newbie -> Sultan), sama seperti mode in-memory
+    centers = sweep[N_CLUSTERS][2]
+    sorted_centers = centers[np.argsort(centers[:, MONETARY_LOG_IDX])]
+
+    # Pass 2..: mini-batch k-means per chunk
+    kmeans_final = MiniBatchKMeans(
+        n_clusters=N_CLUSTERS, init=sorted_centers, n_init=1,
+        batch_size=min(chunk_size, 4096), random_state=42
+    )
+    for epoch in range(epochs):
+        for X in iter_chunks(input_path, chunk_size):
+            kmeans_final.partial_fit(scaler.transform(X))
+    # partial_fit bisa menukar urutan relatif; pastikan urutan akhir tetap by Monetary_Log
+    final_order = np.argsort(kmeans_final.cluster_centers_[:, MONETARY_LOG_IDX])
+    kmeans_final.cluster_centers_ = kmeans_final.cluster_centers_[final_order]
+
+    # Pass terakhir: cluster counts & inertia dengan centroid final
+    counts = np.zeros(N_CLUSTERS, dtype=np.int64)
+    inertia = 0.0
+    for X in iter_chunks(input_path, chunk_size):
+        X_scaled = scaler.transform(X)
+        labels = kmeans_final.predict(X_scaled)
+        counts += np.bincount(labels, minlength=N_CLUSTERS)
+        inertia += float(((X_scaled - kmeans_final.cluster_centers_[labels]) ** 2).sum())
+
+    # PCA data yang sudah di-standardize = eigen-decomposition matriks korelasi (exact dari momen)
+    corr = moments.correlation()
+    eigvals, eigvecs = np.linalg.eigh(corr)
+    top = np.argsort(eigvals)[::-1][:2]
+    pca_var = [round(float(v) * 100, 2) for v in eigvals[top] / eigvals.sum()]
+
+    sample_labels = kmeans_final.predict(sample_scaled)
+    sample_pca = sample_scaled @ eigvecs[:, top]
+    rng = np.random.default_rng(RANDOM_STATE)
+    scatter_idx = rng.choice(sample_scaled.shape[0], min(200, sample_scaled.shape[0]), replace=False)
+    pca_scatter_data = [{
+        "x": round(float(sample_pca[i, 0]), 2),
+        "y": round(float(sample_pca[i, 1]), 2),
+        "cluster": int(sample_labels[i])
+    } for i in scatter_idx]
+
+    # Silhouette: stratified sub-sample dari reservoir
+    silhouette = sampled_silhouette(sample_scaled, sample_labels, sil_sample, sil_repeats)
+
+    return {
+        "scaler": scaler,
+        "kmeans": kmeans_final,
+        "silhouette": silhouette,
+        "inertia": round(inertia, 2),
+        "cluster_counts": {int(i): int(c) for i, c in enumerate(counts)},
+        "pca_variance": pca_var,
+        "elbow_curve": elbow_curve,
+        "pca_scatter": pca_scatter_data,
+        "correlation_matrix": np.round(corr, 2).tolist(),
+        # Reservoir = sample uniform dari semua baris, cukup untuk proporsi per bin
+        "drift_reference": reference_histograms(sample_scaled)
+    }
+
+
+# ---------------------------------------------------------------------------
+# Rekomendasi, metadata & artefak (sama untuk kedua mode)
+# ---------------------------------------------------------------------------
+def build_recommendations(df_prods, centroids):
+    prod_scaler = MinMaxScaler()
+    prod_features = df_prods[['price', 'complexity_score']].values
+    prod_vectors = prod_scaler.fit_transform(prod_features)
+
+    cluster_spending_power = centroids[:, [2, 3]]
+    cluster_vectors = prod_scaler.fit_transform(cluster_spending_power)
+
+    similarity_matrix = cosine_similarity(cluster_vectors, prod_vectors)
+
+    recommendations = {}
+    for i in range(N_CLUSTERS):
+        top_indices = similarity_matrix[i].argsort()[-6:][::-1]
+        selected_prods = df_prods.iloc[top_indices].to_dict(orient="records")
+        for p in selected_prods:
+            p['reason'] = f"Matches {cluster_names[i]} spending profile"
+        recommendations[i] = selected_prods
+    return recommendations
+
+
+# ---------------------------------------------------------------------------
+# Tabel tetangga item-to-item (/products/{pid}/similar): embedding produk dari kolom
+# index, top-k cosine per blok baris. Blok baris independen -> diparalelkan di process pool.
+# ---------------------------------------------------------------------------
+_NEIGHBOR_EMB = None
+
+def _init_neighbor_worker(emb):
+    global _NEIGHBOR_EMB
+    _NEIGHBOR_EMB = emb
+    threadpool_limits(1)
+
+def _neighbor_task(task):
+    start, stop, k, block_size = task
+    return start, neighbor_block(_NEIGHBOR_EMB, start, stop, k, block_size)
+
+def add_neighbor_table(product_index, k=SIMILAR_TOP_K, block_size=SIMILAR_BLOCK_SIZE, jobs=None):
+    columns = {f: product_index[f] for f in ("price", "complexity_score", "popularity_score", "category", "tier") if f in product_index}
+    emb = build_item_embedding(columns)
+    n = emb.shape[0]
+    k = max(0, min(k, n - 1))
+    neighbors = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=np.float32)
+    tasks = [(start, min(start + block_size, n), k, block_size) for start in range(0, n, block_size)] if k else []
+    jobs = min(jobs or os.cpu_count() or 1, max(1, len(tasks)))
+
+    if jobs == 1:
+        # Satu proses: BLAS boleh pakai semua thread, jadi tanpa threadpool_limits
+        global _NEIGHBOR_EMB
+        _NEIGHBOR_EMB = emb
+        results = [_neighbor_task(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_neighbor_worker, initargs=(emb,)) as pool:
+            results = list(pool.map(_neighbor_task, tasks))
+    for start, (idx, sc) in results:
+        neighbors[start:start + idx.shape[0]] = idx
+        scores[start:start + idx.shape[0]] = sc
+
+    product_index["neighbors"] = neighbors
+    product_index["neighbor_scores"] = scores
+    return product_index
+
+
+def build_metadata(result):
+    scaler, kmeans_final = result["scaler"], result["kmeans"]
+
+    centroids_real = scaler.inverse_transform(kmeans_final.cluster_centers_)
+    real_df = pd.DataFrame(centroids_real, columns=features)
+    real_df["Monetary"] = np.expm1(real_df["Monetary_Log"])
+    real_df = real_df.drop(columns=["Monetary_Log"])
+
+    feature_importance = np.abs(kmeans_final.cluster_centers_).mean(axis=0)
+    feat_imp_sorted = sorted(zip(feature_readable, feature_importance), key=lambda x: x[1], reverse=True)
+
+    return {
+        "silhouette_score": result["silhouette"]["score"],
+        "silhouette_ci95": result["silhouette"]["ci95"],
+        "silhouette_sample": {k: result["silhouette"][k] for k in ("sample_size", "repeats", "exact")},
+        "inertia": result["inertia"],
+        "features": features,
+        "feature_readable": feature_readable,
+        "cluster_names": cluster_names,
+        "centroids_scaled": kmeans_final.cluster_centers_.tolist(),
+        "centroids_real": real_df.to_dict(orient="records"),
+        "cluster_counts": result["cluster_counts"],
+        "pca_variance": result["pca_variance"],
+        "elbow_curve": result["elbow_curve"],
+        "global_stats": {
+            "mean": scaler.mean_.tolist(),
+            "std": scaler.scale_.tolist()
+        },
+        # Proporsi training per bin z-score, dibandingkan dengan traffic live oleh app/services/drift.py
+        "drift_reference": result["drift_reference"],
+        "advanced_viz": {
+            "pca_scatter": result["pca_scatter"],
+            "correlation_matrix": result["correlation_matrix"],
+            "silhouette_per_cluster": result["silhouette"]["per_cluster"],
+            "feature_importance": {"labels": [x[0] for x in feat_imp_sorted], "data": [round(x[1],2) for x in feat_imp_sorted]}
+        }
+    }
+
+
+# Tulis ke file sementara lalu os.replace, supaya ModelStore di server tidak pernah
+# membaca artefak setengah jadi saat hot reload
+def atomic_write(path, dump):
+    tmp_path = f"{path}.tmp"
+    dump(tmp_path)
+    os.replace(tmp_path, path)
+
+def dump_json(obj):
+    def _dump(path):
+        with open(path, "w") as f:
+            json.dump(obj, f)
+    return _dump
+
+
+# Artefak serving tanpa pickle (app/ml/arrays/<version>/ + model_manifest.json),
+# diturunkan dari objek yang sama dengan artefak joblib
+def export_serving_arrays(scaler, kmeans, recommendations, product_index, metadata):
+    row_of = {pid: i for i, pid in enumerate(product_index["product_id"].tolist())}
+    clusters = sorted(recommendations)
+    topn_rows = [[row_of[p["product_id"]] for p in recommendations[k]] for k in clusters]
+    topn_reasons = [recommendations[k][0]["reason"] if recommendations[k] else "" for k in clusters]
+    return export_arrays(BASE_DIR, scaler.mean_, scaler.scale_, kmeans.cluster_centers_,
+                         product_index, topn_rows, topn_reasons, meta=metadata)
+
+
+def export_from_joblib(similar_k=SIMILAR_TOP_K, similar_block=SIMILAR_BLOCK_SIZE, jobs=None):
+    with open(f"{BASE_DIR}/model_metrics.json") as f:
+        metadata = json.load(f)
+    product_index = joblib.load(f"{BASE_DIR}/product_index.joblib")
+    # Index lama tanpa tabel tetangga: hitung dari kolom produk yang sudah ada di index
+    if "neighbors" not in product_index:
+        product_index = add_neighbor_table(product_index, similar_k, similar_block, jobs)
+        atomic_write(f"{BASE_DIR}/product_index.joblib", lambda p: joblib.dump(product_index, p))
+    return export_serving_arrays(
+        joblib.load(f"{BASE_DIR}/scaler_preproc.joblib"),
+        joblib.load(f"{BASE_DIR}/kmeans_k2.joblib"),
+        joblib.load(f"{BASE_DIR}/topN_by_cluster.joblib"),
+        product_index,
+        metadata
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train segmentation model & recommendation artifacts")
+    parser.add_argument("--input", default=f"{BASE_DIR}/dummy_ecommerce_clustered.csv", help="CSV atau .parquet")
+    parser.add_argument("--streaming", action="store_true", help="Out-of-core mode: baca CSV per chunk")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--sample-size", type=int, default=20_000, help="Ukuran reservoir sample (elbow, PCA scatter, silhouette)")
+    parser.add_argument("--epochs", type=int, default=1, help="Jumlah pass mini-batch k-means")
+    parser.add_argument("--jobs", type=int, default=None, help="Jumlah proses untuk elbow sweep (default: semua core)")
+    parser.add_argument("--silhouette-sample", type=int, default=10_000)
+    parser.add_argument("--silhouette-repeats", type=int, default=5)
+    parser.add_argument("--similar-k", type=int, default=SIMILAR_TOP_K, help="Jumlah tetangga per produk di tabel similar")
+    parser.add_argument("--similar-block", type=int, default=SIMILAR_BLOCK_SIZE, help="Ukuran blok matmul (memori ~ blok^2 float32)")
+    parser.add_argument("--export-only", action="store_true", help="Tanpa training: export artefak joblib yang ada ke format array")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.export_only:
+        manifest = export_from_joblib(args.similar_k, args.similar_block, args.jobs)
+        print(f"Exported array artifacts version {manifest['version']}")
+        sys.exit(0)
+
+    df_prods = load_products()
+
+    if args.streaming:
+        result = train_streaming(args.input, args.chunk_size, args.sample_size, args.epochs,
+                                 args.jobs, args.silhouette_sample, args.silhouette_repeats)
+    else:
+        result = train_in_memory(args.input, args.jobs, args.silhouette_sample, args.silhouette_repeats)
+
+    centroids = result["kmeans"].cluster_centers_
+    recommendations = build_recommendations(df_prods, centroids)
+    # Index produk untuk retrieval per-user di server (ranking full katalog, bukan 4 list tetap)
+    product_index = build_product_index(df_prods, centroids)
+    product_index = add_neighbor_table(product_index, args.similar_k, args.similar_block, args.jobs)
+    metadata = build_metadata(result)
+
+    atomic_write(f"{BASE_DIR}/scaler_preproc.joblib", lambda p: joblib.dump(result["scaler"], p))
+    atomic_write(f"{BASE_DIR}/kmeans_k2.joblib", lambda p: joblib.dump(result["kmeans"], p))
+    atomic_write(f"{BASE_DIR}/topN_by_cluster.joblib", lambda p: joblib.dump(recommendations, p))
+    atomic_write(f"{BASE_DIR}/product_index.joblib", lambda p: joblib.dump(product_index, p))
+    atomic_write(f"{BASE_DIR}/model_metrics.json", dump_json(metadata))
+    # Manifest ditulis paling akhir: server yang watch app/ml/ langsung pindah ke versi array baru
+    manifest = export_serving_arrays(result["scaler"], result["kmeans"], recommendations, product_index, metadata)
+    print(f"Array artifacts version {manifest['version']}")
 
-print("Training Complete. Advanced Visualization Data Generated.")
\ No newline at end of file
+    print("Training Complete. Advanced Visualization Data Generated.")
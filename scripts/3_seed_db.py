@@ -1,30 +1,165 @@
 import pandas as pd
 from sqlalchemy import create_engine
+import io
+import csv
 import sys
 import os
+import time
+import argparse
 
 sys.path.append(os.getcwd())
 
 from app.config import DATABASE_URL
+from app.database import Base
+from app.models.product import Product
+from app.models.user import User
 
-def seed_products():
-    csv_path = "app/ml/products_dummy.csv"
-    if not os.path.exists(csv_path):
-        return
+# CSV column -> kolom tabel. Kolom CSV yang tidak ada di tabel (price, tier, ...) diabaikan
+PRODUCT_COLUMNS = {
+    "product_id": "product_id",
+    "product_name": "name",
+    "name": "name",
+    "category": "category",
+    "style": "style"
+}
+USER_COLUMNS = {
+    "user_id": "user_id",
+    "Recency": "recency",
+    "Frequency": "frequency",
+    "Monetary": "monetary",
+    "Avg_Items": "avg_items",
+    "Unique_Products": "unique_products",
+    "Wishlist_Count": "wishlist_count",
+    "Add_to_Cart_Count": "add_to_cart_count",
+    "Page_Views": "page_views",
+    "Preferred_Category": "preferred_category",
+    "Second_Category": "second_category",
+    "Preferred_Style": "preferred_style"
+}
 
-    df = pd.read_csv(csv_path)
-    df = df.rename(columns={"product_name": "name"})
-    
-    if "style" not in df.columns:
-        df["style"] = "General"
 
-    engine = create_engine(DATABASE_URL)
-    
+# CSV atau Parquet (1_generate_data.py --format parquet), dipilih dari ekstensi file
+def _raw_chunks(path, chunk_size):
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("Input parquet butuh pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def read_chunks(csv_path, mapping, chunk_size, defaults=None):
+    for df in _raw_chunks(csv_path, chunk_size):
+        df = df.rename(columns=mapping)
+        df = df[[c for c in dict.fromkeys(mapping.values()) if c in df.columns]]
+        for col, value in (defaults or {}).items():
+            if col not in df.columns:
+                df[col] = value
+        yield df
+
+
+# Upsert per dialect. Kolom yang di-update saat konflik = kolom dari CSV saja, jadi
+# email/hashed_password user yang sudah register tidak tertimpa.
+def upsert_sqlite(conn, table, pk, df):
+    cols = list(df.columns)
+    updates = ", ".join(f"{c} = excluded.{c}" for c in cols if c != pk)
+    sql = (
+        f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))}) "
+        f"ON CONFLICT ({pk}) DO UPDATE SET {updates}"
+    )
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    conn.exec_driver_sql(sql, list(rows))
+
+
+def upsert_postgresql(conn, table, pk, df):
+    cols = list(df.columns)
+    stage = f"_stage_{table}"
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in cols if c != pk)
+
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, quoting=csv.QUOTE_MINIMAL)
+    buf.seek(0)
+
+    cursor = conn.connection.cursor()
     try:
-        df.to_sql('products', engine, if_exists='append', index=False)
-        print("Seeding Berhasil")
-    except Exception as e:
-        print(e)
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS")
+        cursor.copy_expert(f"COPY {stage} ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv)", buf)
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(cols)}) SELECT {', '.join(cols)} FROM {stage} "
+            f"ON CONFLICT ({pk}) DO UPDATE SET {updates}"
+        )
+        # Satu transaksi untuk seluruh file (ON COMMIT belum jalan): kosongkan stage per chunk,
+        # kalau tidak chunk berikutnya meng-upsert ulang semua chunk sebelumnya
+        cursor.execute(f"TRUNCATE {stage}")
+    finally:
+        cursor.close()
+
+
+UPSERTS = {
+    "sqlite": upsert_sqlite,
+    "postgresql": upsert_postgresql
+}
+
+
+def seed_table(engine, table, pk, chunks):
+    upsert = UPSERTS.get(engine.dialect.name)
+    if upsert is None:
+        sys.exit(f"Dialect {engine.dialect.name} belum didukung (sqlite / postgresql)")
+
+    rows = 0
+    t0 = time.perf_counter()
+    # Satu transaksi untuk seluruh file: gagal di tengah = rollback, rerun aman
+    with engine.begin() as conn:
+        for df in chunks:
+            upsert(conn, table, pk, df)
+            rows += len(df)
+        if engine.dialect.name == "postgresql" and table == "users":
+            # Id di-insert eksplisit, geser sequence supaya /auth/register tidak bentrok
+            conn.exec_driver_sql(
+                "SELECT setval(pg_get_serial_sequence('users', 'user_id'), "
+                "COALESCE((SELECT MAX(user_id) FROM users), 1))"
+            )
+    elapsed = time.perf_counter() - t0
+    print(f"{table}: {rows} rows upserted in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return rows
+
+
+def seed_products(engine, csv_path, chunk_size):
+    if not os.path.exists(csv_path):
+        print(f"Skip products: {csv_path} tidak ada")
+        return 0
+    chunks = read_chunks(csv_path, PRODUCT_COLUMNS, chunk_size, defaults={"style": "General"})
+    return seed_table(engine, Product.__tablename__, "product_id", chunks)
+
+
+def seed_users(engine, csv_path, chunk_size):
+    if not os.path.exists(csv_path):
+        print(f"Skip users: {csv_path} tidak ada")
+        return 0
+    chunks = read_chunks(csv_path, USER_COLUMNS, chunk_size)
+    return seed_table(engine, User.__tablename__, "user_id", chunks)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk, idempotent seeding products & users")
+    parser.add_argument("--products", default="app/ml/products_dummy.csv")
+    parser.add_argument("--users", default="app/ml/dummy_ecommerce_clustered.csv", help="CSV atau .parquet")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--skip-products", action="store_true")
+    parser.add_argument("--skip-users", action="store_true")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    seed_products()
\ No newline at end of file
+    args = parse_args()
+    engine = create_engine(DATABASE_URL)
+    Base.metadata.create_all(bind=engine, tables=[Product.__table__, User.__table__])
+
+    if not args.skip_products:
+        seed_products(engine, args.products, args.chunk_size)
+    if not args.skip_users:
+        seed_users(engine, args.users, args.chunk_size)
+    print("Seeding Berhasil")
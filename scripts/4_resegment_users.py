@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.getcwd())
+
+from app.database import Base, engine, add_missing_columns, add_missing_indexes
+from app.services.model_store import ModelStore
+from app.services.segmentation import iter_user_chunks, score_chunk, write_assignments
+from app.services.recommendations import materialize_chunk
+
+# Offline re-segmentasi: isi users.cluster_id dengan model yang sedang aktif di app/ml.
+# Incremental: user yang versi model & hash fiturnya sama dilewati, jadi rerun setelah
+# crash/berhenti otomatis lanjut dari yang belum selesai. --recommendations juga mengisi
+# user_recommendations (dibaca GET /recommend/me) dengan aturan incremental yang sama.
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk re-segmentation users.cluster_id")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--start-after", type=int, default=None, help="Mulai dari user_id > nilai ini")
+    parser.add_argument("--force", action="store_true", help="Hitung ulang semua user walau tidak berubah")
+    parser.add_argument("--recommendations", action="store_true", help="Sekalian refresh tabel user_recommendations")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+
+    bundle = ModelStore().reload()
+    if bundle is None:
+        sys.exit("Artefak model tidak bisa di-load")
+    print(f"Model version {bundle.version}")
+
+    scanned = written = materialized = 0
+    t0 = time.perf_counter()
+    for rows in iter_user_chunks(engine, args.chunk_size, args.start_after):
+        updates = score_chunk(rows, bundle.scorer, bundle.version, force=args.force)
+        written += write_assignments(engine, updates)
+        if args.recommendations:
+            materialized += materialize_chunk(engine, bundle, rows)
+        scanned += len(rows)
+        elapsed = time.perf_counter() - t0
+        print(f"  ..user_id {rows[-1][0]}: scanned {scanned}, updated {written}, recs {materialized} ({scanned / elapsed:,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - t0
+    print(f"Re-segmentation done: {scanned} scanned, {written} updated, {materialized} recommendations refreshed in {elapsed:.2f}s")
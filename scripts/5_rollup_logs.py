@@ -0,0 +1,40 @@
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.getcwd())
+
+from app.database import Base, engine, add_missing_columns, add_missing_indexes
+from app.services.log_rollup import run_rollup, ROLLUP_LOCK
+from app.services.worker_lock import WorkerLock
+from app.config import LOG_RETENTION_DAYS
+
+# Rollup harian prediction_logs -> prediction_cluster_daily / prediction_product_daily,
+# lalu hapus raw log di luar retention window. Aman dijalankan ulang (per hari idempotent);
+# untuk cron kalau job periodik di app dimatikan (LOG_ROLLUP_INTERVAL=0).
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Daily prediction log rollup & retention")
+    parser.add_argument("--retention-days", type=int, default=LOG_RETENTION_DAYS, help="0 = jangan prune raw log")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+
+    # Lock yang sama dengan job di app: kalau ada worker yang sedang jadi runner, cron tidak ikut jalan
+    lock = WorkerLock(ROLLUP_LOCK, engine)
+    if not lock.acquire(blocking=False):
+        print("Rollup is already handled by another process, skipping")
+        sys.exit(0)
+    try:
+        t0 = time.perf_counter()
+        stats = run_rollup(engine, args.retention_days)
+        print(f"Rollup done in {time.perf_counter() - t0:.2f}s: {stats}")
+    finally:
+        lock.release()
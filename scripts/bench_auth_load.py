@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import subprocess
+import requests
+import numpy as np
+
+# Mixed load: N client spam /auth/login sementara M client hit /recommend/user.
+# Dijalankan 2x: hashing inline di threadpool (PASSWORD_HASH_WORKERS=0, perilaku lama)
+# vs process pool khusus bcrypt. Jalankan dari root repo.
+
+PORT = int(os.getenv("BENCH_PORT", 8765))
+BASE = f"http://127.0.0.1:{PORT}"
+DURATION = float(os.getenv("BENCH_DURATION", 15))
+LOGIN_CLIENTS = int(os.getenv("BENCH_LOGIN_CLIENTS", 32))
+RECOMMEND_CLIENTS = int(os.getenv("BENCH_RECOMMEND_CLIENTS", 8))
+
+PROFILE = {
+    "Recency": 3, "Frequency": 45, "Monetary": 5000, "Avg_Items": 5.0,
+    "Unique_Products": 25, "Wishlist_Count": 20, "Add_to_Cart_Count": 30, "Page_Views": 80
+}
+
+
+def start_server(hash_workers, db_path):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{db_path}"
+    env["PASSWORD_HASH_WORKERS"] = str(hash_workers)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env
+    )
+    for _ in range(100):
+        try:
+            requests.get(f"{BASE}/docs", timeout=1)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Server did not start")
+
+
+def login_worker(email, stop, counts):
+    session = requests.Session()
+    while not stop.is_set():
+        r = session.post(f"{BASE}/auth/login", json={"email": email, "password": "benchpass"})
+        counts.append(r.status_code)
+
+
+def recommend_worker(token, stop, latencies):
+    session = requests.Session()
+    headers = {"Authorization": f"Bearer {token}"}
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.post(f"{BASE}/recommend/user", json=PROFILE, headers=headers)
+        latencies.append(time.perf_counter() - start)
+
+
+def run_mode(label, hash_workers):
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    proc = start_server(hash_workers, db_path)
+    try:
+        token = None
+        for i in range(LOGIN_CLIENTS):
+            r = requests.post(f"{BASE}/auth/register", json={"email": f"bench{i}@example.com", "password": "benchpass", "name": f"Bench {i}"})
+            token = token or r.json()["access_token"]
+
+        stop = threading.Event()
+        logins, latencies = [], []
+        threads = [threading.Thread(target=login_worker, args=(f"bench{i}@example.com", stop, logins)) for i in range(LOGIN_CLIENTS)]
+        threads += [threading.Thread(target=recommend_worker, args=(token, stop, latencies)) for _ in range(RECOMMEND_CLIENTS)]
+        for t in threads:
+            t.start()
+        time.sleep(DURATION)
+        stop.set()
+        for t in threads:
+            t.join()
+
+        lat_ms = np.array(latencies) * 1000
+        ok_logins = sum(1 for c in logins if c == 200)
+        return {
+            "mode": label,
+            "login_per_sec": round(ok_logins / DURATION, 1),
+            "login_rejected": sum(1 for c in logins if c == 503),
+            "recommend_per_sec": round(len(lat_ms) / DURATION, 1),
+            "recommend_p50_ms": round(float(np.percentile(lat_ms, 50)), 2) if len(lat_ms) else None,
+            "recommend_p99_ms": round(float(np.percentile(lat_ms, 99)), 2) if len(lat_ms) else None
+        }
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    workers = int(os.getenv("PASSWORD_HASH_WORKERS", 2)) or 2
+    results = [run_mode("inline (before)", 0), run_mode(f"process pool x{workers} (after)", workers)]
+    for r in results:
+        print(r)
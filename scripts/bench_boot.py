@@ -0,0 +1,74 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import requests
+import numpy as np
+
+# Cold start: waktu import app.main dan waktu sampai uvicorn siap melayani request
+# (GET /models/version 200), plus rincian fase boot dari /metrics. Jalankan dari root repo.
+
+PORT = int(os.getenv("BENCH_PORT", 8767))
+BASE = f"http://127.0.0.1:{PORT}"
+RUNS = int(os.getenv("BENCH_RUNS", 5))
+
+
+def bench_env():
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'boot.db')}"
+    env.setdefault("SECRET_KEY", "bench-secret")
+    env.setdefault("ALGORITHM", "HS256")
+    return env
+
+
+def import_time():
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], env=bench_env(), capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def time_to_ready():
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=bench_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            try:
+                if requests.get(f"{BASE}/models/version", timeout=0.5).status_code == 200:
+                    break
+            except requests.RequestException:
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+            time.sleep(0.01)
+        ready = time.perf_counter() - start
+        phases = {}
+        for line in requests.get(f"{BASE}/metrics").text.splitlines():
+            if line.startswith("app_boot_seconds_"):
+                name, value = line.split()
+                phases[name[len("app_boot_seconds_"):]] = float(value)
+        return ready, phases
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def summary(values):
+    return f"median {np.median(values) * 1000:8.1f} ms  min {np.min(values) * 1000:8.1f} ms"
+
+
+if __name__ == "__main__":
+    imports = [import_time() for _ in range(RUNS)]
+    print(f"import app.main        {summary(imports)}")
+
+    readies, phases = [], []
+    for _ in range(RUNS):
+        ready, p = time_to_ready()
+        readies.append(ready)
+        phases.append(p)
+    print(f"uvicorn time-to-ready  {summary(readies)}")
+    for name in phases[0]:
+        print(f"  boot phase {name:<10} {summary([p[name] for p in phases if name in p])}")
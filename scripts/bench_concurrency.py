@@ -0,0 +1,198 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import httpx
+import numpy as np
+
+# Berapa request bisa "in flight" sekaligus: N client async (httpx) menembak app via uvicorn
+# (1 worker) terhadap DB lokal (SQLite default, atau PostgreSQL lewat --database-url).
+# Opsional --ref: jalankan skenario yang sama di revisi git lain (mis. versi sync) sebagai pembanding.
+#
+#   python scripts/bench_concurrency.py --concurrency 16,64,256
+#   python scripts/bench_concurrency.py --ref HEAD~1 --out bench_results_concurrency.json
+#
+# Jalankan dari root repo.
+
+PORT = int(os.getenv("BENCH_PORT", 8768))
+BASE = f"http://127.0.0.1:{PORT}"
+N_USERS = 32
+PASSWORD = "benchpass"
+PROFILE = {
+    "Recency": 14, "Frequency": 10, "Monetary": 500, "Avg_Items": 2.5,
+    "Unique_Products": 5, "Wishlist_Count": 5, "Add_to_Cart_Count": 12, "Page_Views": 40
+}
+
+
+# Tiap skenario: (client, tokens, i) -> coroutine response
+def sc_recommend_me(client, tokens, i):
+    return client.get("/recommend/me", headers=tokens[i % len(tokens)])
+
+def sc_recommend_user(client, tokens, i):
+    return client.post("/recommend/user", json=PROFILE, headers=tokens[i % len(tokens)])
+
+def sc_products(client, tokens, i):
+    return client.get("/products/", params={"limit": 20, "cursor": i % 50})
+
+SCENARIOS = {
+    "recommend_me": sc_recommend_me,
+    "recommend_user": sc_recommend_user,
+    "products": sc_products
+}
+
+
+def start_server(root, database_url):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env["PYTHONPATH"] = root
+    env.setdefault("SECRET_KEY", "bench-secret")
+    env.setdefault("ALGORITHM", "HS256")
+
+    subprocess.run([sys.executable, "scripts/3_seed_db.py", "--skip-users"], cwd=root, env=env, check=True, stdout=subprocess.DEVNULL)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning", "--backlog", "4096"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL
+    )
+    for _ in range(150):
+        try:
+            httpx.get(f"{BASE}/models/version", timeout=1)
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Server did not start")
+
+
+async def prepare_tokens(client):
+    tokens = []
+    for i in range(N_USERS):
+        email = f"conc{i}@example.com"
+        r = await client.post("/auth/register", json={"email": email, "password": PASSWORD, "name": f"Conc {i}"})
+        if r.status_code != 200:
+            r = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+        tokens.append({"Authorization": f"Bearer {r.json()['access_token']}"})
+    return tokens
+
+
+async def run_load(fn, tokens, concurrency, duration):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=BASE, limits=limits, timeout=60) as client:
+        for i in range(20):
+            await fn(client, tokens, i)
+
+        latencies, errors = [], [0]
+        deadline = time.perf_counter() + duration
+
+        async def worker(w):
+            i = w * 1000
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    r = await fn(client, tokens, i)
+                    ok = r.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors[0] += 1
+                i += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    lat = np.array(latencies)
+    result = {
+        "concurrency": concurrency,
+        "requests": int(lat.size),
+        "errors": errors[0],
+        "rps": round(lat.size / elapsed, 1),
+        # Little's law: rata-rata request yang benar-benar sedang dilayani
+        "avg_in_flight": round(float(lat.sum() / elapsed), 1)
+    }
+    for p in (50, 99):
+        result[f"p{p}_ms"] = round(float(np.percentile(lat, p)) * 1000, 2) if lat.size else None
+    return result
+
+
+def server_gauges():
+    gauges = {}
+    try:
+        text = httpx.get(f"{BASE}/metrics").text
+    except httpx.HTTPError:
+        return gauges
+    for line in text.splitlines():
+        if line.startswith(("http_requests_in_flight_peak", "db_pool_checked_out", "db_pool_overflow")):
+            name, value = line.split()
+            gauges[name] = float(value)
+    return gauges
+
+
+def bench_tree(root, label, args):
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'conc.db')}"
+    proc = start_server(root, database_url)
+    results = {}
+    try:
+        async def _main():
+            async with httpx.AsyncClient(base_url=BASE, timeout=60) as client:
+                tokens = await prepare_tokens(client)
+            for name in args.scenarios.split(","):
+                for c in [int(x) for x in args.concurrency.split(",")]:
+                    key = f"{name}@c{c}"
+                    r = await run_load(SCENARIOS[name], tokens, c, args.duration)
+                    results[key] = r
+                    print(f"[{label}] {key:<22} {r['rps']:>8} req/s  in-flight {r['avg_in_flight']:>6}  "
+                          f"p50 {r['p50_ms']} ms  p99 {r['p99_ms']} ms  errors {r['errors']}")
+        asyncio.run(_main())
+        results["server"] = server_gauges()
+    finally:
+        proc.terminate()
+        proc.wait()
+    return results
+
+
+def bench_ref(ref, args):
+    path = tempfile.mkdtemp(prefix="bench_ref_")
+    subprocess.run(["git", "worktree", "add", "--detach", path, ref], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return bench_tree(path, ref, args)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", path], check=False)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrency benchmark (requests in flight)")
+    parser.add_argument("--concurrency", default=os.getenv("BENCH_CONCURRENCY", "16,64,256"))
+    parser.add_argument("--duration", type=float, default=float(os.getenv("BENCH_DURATION", 10)))
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--database-url", default=None, help="Default: SQLite baru di temp dir")
+    parser.add_argument("--ref", default=None, help="Revisi git pembanding, mis. HEAD~1")
+    parser.add_argument("--out", default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    unknown = [s for s in args.scenarios.split(",") if s not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenarios: {unknown}")
+
+    report = {"current": bench_tree(os.getcwd(), "current", args)}
+    if args.ref:
+        report[args.ref] = bench_ref(args.ref, args)
+        for key, cur in report["current"].items():
+            base = report[args.ref].get(key)
+            if key == "server" or not base:
+                continue
+            print(f"{key:<22} rps {base['rps']:>8} -> {cur['rps']:<8} p99 {base['p99_ms']} -> {cur['p99_ms']} ms")
+    print(f"server gauges: {report['current']['server']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved {args.out}")
@@ -0,0 +1,100 @@
+import time
+import sys
+import os
+import hashlib
+import importlib.util
+import subprocess
+import tempfile
+
+sys.path.append(os.getcwd())
+
+# Modul dengan nama file berawalan angka -> load manual
+_spec = importlib.util.spec_from_file_location("generate_data", os.path.join(os.path.dirname(__file__), "1_generate_data.py"))
+gen = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gen)
+
+# Rows/sec: loop Python lama vs generator vectorized (1 proses & multi-proses)
+LOOP_USERS = int(os.getenv("BENCH_LOOP_USERS", 100_000))
+VEC_USERS = int(os.getenv("BENCH_VEC_USERS", 10_000_000))
+CHUNK_SIZE = int(os.getenv("BENCH_CHUNK_SIZE", 500_000))
+WORKERS = [int(w) for w in os.getenv("BENCH_WORKERS", f"1,{os.cpu_count() or 1}").split(",")]
+FEATURES = gen.USER_COLUMNS[1:]
+
+
+def persona_summary(df):
+    persona = (df["user_id"].to_numpy() - 1) % 4
+    return {
+        p: {c: (df[c][persona == p].min(), df[c][persona == p].max(), df[c][persona == p].mean()) for c in FEATURES}
+        for p in range(4)
+    }
+
+
+def check_distributions(n=200_000):
+    # Min/max per persona harus identik, mean beda < 2% (sampling noise)
+    loop = persona_summary(gen.generate_users_loop(n))
+    vec = persona_summary(gen.generate_users_chunk((0, 0, n, 42)))
+    worst = 0.0
+    for p in range(4):
+        for c in FEATURES:
+            lo_a, hi_a, mean_a = loop[p][c]
+            lo_b, hi_b, mean_b = vec[p][c]
+            assert (lo_a, hi_a) == (lo_b, hi_b), f"persona {p} {c}: range {lo_a}-{hi_a} vs {lo_b}-{hi_b}"
+            worst = max(worst, abs(mean_a - mean_b) / max(abs(mean_a), 1e-9))
+    assert worst < 0.02, f"mean drift {worst:.3%}"
+    print(f"Distribution check OK (n={n}, max mean drift {worst:.3%})")
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def check_worker_independence(n=1_000_000, chunk_size=100_000):
+    # File lengkap lewat CLI dengan --workers 1 vs --workers N harus byte-identik
+    workers = max(2, max(WORKERS))
+    script = os.path.join(os.path.dirname(__file__), "1_generate_data.py")
+    hashes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for w in (1, workers):
+            path = os.path.join(tmp, f"users_w{w}.csv")
+            subprocess.run(
+                [sys.executable, script, "--vectorized", "--users", str(n), "--chunk-size", str(chunk_size),
+                 "--workers", str(w), "--output", path, "--skip-products"],
+                check=True, stdout=subprocess.DEVNULL
+            )
+            hashes[w] = _sha256(path)
+    assert hashes[1] == hashes[workers], f"output differs: workers=1 {hashes[1]} vs workers={workers} {hashes[workers]}"
+    print(f"Worker check OK (n={n}, workers 1 vs {workers}, sha256 {hashes[1][:12]})")
+
+
+def bench(label, n, fn):
+    t0 = time.perf_counter()
+    rows = fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<28} {n:>12,} rows  {elapsed:8.2f}s  {rows / elapsed:>14,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    check_distributions()
+
+    check_worker_independence()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.csv")
+        bench("loop (legacy)", LOOP_USERS,
+              lambda: gen.write_user_chunks([gen.generate_users_loop(LOOP_USERS)], path, "csv"))
+        bench("vectorized generate only", VEC_USERS,
+              lambda: sum(len(df) for df in gen.iter_user_chunks(VEC_USERS, CHUNK_SIZE, 42, 1)))
+        for w in WORKERS:
+            bench(f"vectorized csv workers={w}", VEC_USERS,
+                  lambda: gen.write_user_chunks(gen.iter_user_chunks(VEC_USERS, CHUNK_SIZE, 42, w), path, "csv"))
+        try:
+            import pyarrow  # noqa: F401
+            bench("vectorized parquet", VEC_USERS,
+                  lambda: gen.write_user_chunks(gen.iter_user_chunks(VEC_USERS, CHUNK_SIZE, 42, WORKERS[-1]),
+                                                os.path.join(tmp, "users.parquet"), "parquet"))
+        except ImportError:
+            print("pyarrow tidak terinstall, skip parquet")
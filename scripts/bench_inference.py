@@ -0,0 +1,69 @@
+import time
+import sys
+import os
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.getcwd())
+
+from app.services.scoring import CompiledScorer, RAW_COLS, USE_COLS
+
+BASE_DIR = "app/ml"
+N_PARITY = 1000
+N_LATENCY = 2000
+
+
+def sklearn_path(scaler, kmeans, row):
+    # Jalur lama: DataFrame 1 baris -> scaler.transform -> kmeans.predict
+    df = pd.DataFrame([row])
+    df["Monetary_Log"] = np.log1p(df["Monetary"])
+    X = scaler.transform(df[USE_COLS])
+    return int(kmeans.predict(X)[0]), X[0]
+
+
+def compiled_path(scorer, row):
+    scored = scorer.score_one(tuple(row[c] for c in RAW_COLS))
+    return int(scored["cluster"][0]), scored["Z"][0]
+
+
+def check_parity(scaler, kmeans, scorer, rows):
+    mismatches = 0
+    for row in rows:
+        c_old, z_old = sklearn_path(scaler, kmeans, row)
+        c_new, z_new = compiled_path(scorer, row)
+        if c_old != c_new or not np.allclose(z_old, z_new, rtol=1e-9, atol=1e-12):
+            mismatches += 1
+        if c_new != scorer.predict_one(tuple(row[c] for c in RAW_COLS)):
+            mismatches += 1
+    return mismatches
+
+
+def time_per_call(fn, rows):
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows) * 1e6
+
+
+if __name__ == "__main__":
+    scaler = joblib.load(f"{BASE_DIR}/scaler_preproc.joblib")
+    kmeans = joblib.load(f"{BASE_DIR}/kmeans_k2.joblib")
+    scorer = CompiledScorer.from_sklearn(scaler, kmeans)
+
+    df = pd.read_csv(f"{BASE_DIR}/dummy_ecommerce_clustered.csv")
+    rows = df[RAW_COLS].sample(N_PARITY, replace=True, random_state=42).to_dict(orient="records")
+
+    mismatches = check_parity(scaler, kmeans, scorer, rows)
+    print(f"Parity: {len(rows) - mismatches}/{len(rows)} rows match sklearn")
+    if mismatches:
+        sys.exit(1)
+
+    bench_rows = (rows * (N_LATENCY // len(rows) + 1))[:N_LATENCY]
+    old_us = time_per_call(lambda r: sklearn_path(scaler, kmeans, r), bench_rows)
+    new_us = time_per_call(lambda r: compiled_path(scorer, r), bench_rows)
+    fast_us = time_per_call(lambda r: scorer.predict_one(tuple(r[c] for c in RAW_COLS)), bench_rows)
+
+    print(f"pandas + sklearn      : {old_us:8.1f} us/request")
+    print(f"compiled score_one    : {new_us:8.1f} us/request ({old_us / new_us:.1f}x)")
+    print(f"compiled predict_one  : {fast_us:8.1f} us/request ({old_us / fast_us:.1f}x)")
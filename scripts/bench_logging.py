@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import logging
+import tempfile
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+# Biaya logger.info("prediction", ...) di thread pemanggil (= request path):
+# FileHandler sync (format + write di thread request) vs QueueHandler + listener thread.
+# Jalankan dari root repo.
+
+N = int(os.getenv("BENCH_N", 100_000))
+FIELDS = {"sample_key": "recommend_user", "user_id": 42, "cluster": 3, "confidence": 69.5, "model_version": "418e5c7ebec1"}
+
+
+def measure(logger, n=N):
+    lat = np.empty(n, dtype=np.int64)
+    for i in range(n):
+        t = time.perf_counter_ns()
+        logger.info("prediction", extra=FIELDS)
+        lat[i] = time.perf_counter_ns() - t
+    return lat
+
+
+def summary(name, lat):
+    us = lat / 1000
+    print(f"{name:<22} mean {us.mean():7.2f} us  p50 {np.percentile(us, 50):7.2f} us  "
+          f"p99 {np.percentile(us, 99):8.2f} us  max {us.max():10.1f} us")
+
+
+if __name__ == "__main__":
+    tmp = tempfile.mkdtemp()
+    os.environ.setdefault("APP_LOG_FILE", os.path.join(tmp, "pipeline.log"))
+    os.environ.setdefault("APP_LOG_CONSOLE", "false")
+    from app.services.logging_pipeline import JsonFormatter, logging_pipeline
+
+    sync_logger = logging.getLogger("bench.sync")
+    sync_logger.propagate = False
+    handler = logging.FileHandler(os.path.join(tmp, "sync.log"))
+    handler.setFormatter(JsonFormatter())
+    sync_logger.addHandler(handler)
+    sync_logger.setLevel(logging.INFO)
+    summary("sync FileHandler", measure(sync_logger))
+    handler.close()
+
+    logging_pipeline.start()
+    summary("QueueHandler pipeline", measure(logging.getLogger("app.predictions")))
+    t = time.perf_counter()
+    logging_pipeline.stop()
+    print(f"listener drain on stop {time.perf_counter() - t:.2f}s, stats {logging_pipeline.stats()}")
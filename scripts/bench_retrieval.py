@@ -0,0 +1,63 @@
+import time
+import sys
+import os
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.getcwd())
+
+from app.services.retrieval import build_product_index, ProductIndex
+
+# Latency top-K per user vs ukuran katalog (katalog sintetis, distribusi tier mirip 1_generate_data.py)
+SIZES = [int(s) for s in os.getenv("BENCH_SIZES", "10000,100000,1000000,2000000").split(",")]
+N_QUERIES = int(os.getenv("BENCH_QUERIES", 300))
+K = 6
+
+TIERS = ["Budget", "Standard", "Premium", "Luxury"]
+TIER_PRICING = {"Budget": (5, 40), "Standard": (50, 150), "Premium": (200, 800), "Luxury": (1000, 5000)}
+CATEGORIES = ["Electronics", "Fashion", "Home & Living", "Skincare"]
+
+
+def synthetic_catalog(n, rng):
+    tier = rng.choice(TIERS, size=n, p=[0.4, 0.3, 0.2, 0.1])
+    tier_idx = pd.Series(tier).map({t: i for i, t in enumerate(TIERS)}).to_numpy()
+    bounds = np.array([TIER_PRICING[t] for t in TIERS])
+    price = rng.integers(bounds[tier_idx, 0], bounds[tier_idx, 1] + 1)
+    return pd.DataFrame({
+        "product_id": np.arange(n) + 100,
+        "name": np.array([f"Product {i}" for i in range(n)], dtype=object),
+        "category": rng.choice(CATEGORIES, size=n),
+        "price": price,
+        "tier": tier,
+        "complexity_score": np.round(price / 5000 * 10 + rng.normal(0, 0.5, n), 2),
+        "popularity_score": rng.uniform(0, 10, n)
+    })
+
+
+def percentiles(samples):
+    ms = np.array(samples) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    centroids = rng.normal(0, 1, (4, 8))
+    users = rng.normal(0, 1.5, (N_QUERIES, 8))
+
+    print(f"{'catalog':>10} {'p50 ms':>8} {'p99 ms':>8} {'filtered p50':>13} {'filtered p99':>13}")
+    for n in SIZES:
+        index = ProductIndex(build_product_index(synthetic_catalog(n, rng), centroids))
+
+        plain, filtered = [], []
+        for z in users:
+            start = time.perf_counter()
+            index.top_k(z, K)
+            plain.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            index.top_k(z, K, category="Fashion", tier="Luxury")
+            filtered.append(time.perf_counter() - start)
+
+        p50, p99 = percentiles(plain)
+        f50, f99 = percentiles(filtered)
+        print(f"{n:>10} {p50:>8.3f} {p99:>8.3f} {f50:>13.3f} {f99:>13.3f}")
@@ -0,0 +1,260 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime, timezone
+import requests
+import numpy as np
+
+# Benchmark & load test hot path serving. App dijalankan via uvicorn terhadap SQLite baru
+# + artefak app/ml/, lalu tiap skenario di-hit oleh N client lokal selama DURATION detik.
+#
+#   python scripts/bench_serving.py run --out bench_results.json
+#   python scripts/bench_serving.py compare baseline.json bench_results.json
+#   python scripts/bench_serving.py run --baseline baseline.json   (run + compare)
+#
+# Jalankan dari root repo.
+
+PORT = int(os.getenv("BENCH_PORT", 8766))
+BASE = f"http://127.0.0.1:{PORT}"
+N_PROFILES = 1000
+N_USERS = 8
+PASSWORD = "benchpass"
+
+METRICS_FIELDS = "silhouette_score,inertia,feature_readable,centroids_scaled,centroids_real,cluster_counts,elbow_curve,advanced_viz"
+
+
+def random_profiles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{
+        "Recency": int(rng.integers(0, 100)),
+        "Frequency": int(rng.integers(0, 50)),
+        "Monetary": int(rng.integers(0, 10000)),
+        "Avg_Items": round(float(rng.uniform(1, 5)), 1),
+        "Unique_Products": int(rng.integers(0, 30)),
+        "Wishlist_Count": int(rng.integers(0, 20)),
+        "Add_to_Cart_Count": int(rng.integers(0, 40)),
+        "Page_Views": int(rng.integers(0, 200))
+    } for _ in range(n)]
+
+
+# Tiap skenario: fungsi (session, ctx, i) -> response. `i` = nomor request per client
+def sc_recommend_user(session, ctx, i):
+    return session.post(f"{BASE}/recommend/user", json=ctx["profiles"][i % N_PROFILES], headers=ctx["auth"])
+
+def sc_cluster_predict(session, ctx, i):
+    return session.post(f"{BASE}/cluster/predict", json=ctx["profiles"][i % N_PROFILES])
+
+def sc_cluster_metrics(session, ctx, i):
+    return session.get(f"{BASE}/cluster/metrics", params={"fields": METRICS_FIELDS}, headers={"Accept-Encoding": "gzip"})
+
+def sc_products(session, ctx, i):
+    return session.get(f"{BASE}/products/", params={"limit": 20})
+
+def sc_auth_login(session, ctx, i):
+    return session.post(f"{BASE}/auth/login", json={"email": f"bench{i % N_USERS}@example.com", "password": PASSWORD})
+
+SCENARIOS = {
+    "recommend_user": sc_recommend_user,
+    "cluster_predict": sc_cluster_predict,
+    "cluster_metrics": sc_cluster_metrics,
+    "products": sc_products,
+    "auth_login": sc_auth_login
+}
+
+
+def start_server(db_path):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{db_path}"
+    env.setdefault("SECRET_KEY", "bench-secret")
+    env.setdefault("ALGORITHM", "HS256")
+
+    # Seed products (dan tabel) sebelum server start, supaya /products tidak kosong
+    subprocess.run([sys.executable, "scripts/3_seed_db.py", "--skip-users"], env=env, check=True, stdout=subprocess.DEVNULL)
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env
+    )
+    for _ in range(150):
+        try:
+            requests.get(f"{BASE}/models/version", timeout=1)
+            return proc
+        except requests.RequestException:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("Server did not start")
+
+
+def prepare_context():
+    token = None
+    for i in range(N_USERS):
+        r = requests.post(f"{BASE}/auth/register", json={"email": f"bench{i}@example.com", "password": PASSWORD, "name": f"Bench {i}"})
+        token = token or r.json()["access_token"]
+    return {"profiles": random_profiles(N_PROFILES), "auth": {"Authorization": f"Bearer {token}"}}
+
+
+def run_load(fn, ctx, concurrency, duration, warmup=20):
+    session = requests.Session()
+    for i in range(warmup):
+        fn(session, ctx, i)
+
+    stop = threading.Event()
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+
+    def worker(w):
+        s = requests.Session()
+        i = w * 100_003
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                r = fn(s, ctx, i)
+                ok = r.status_code < 400
+            except requests.RequestException:
+                ok = False
+            if ok:
+                latencies[w].append(time.perf_counter() - start)
+            else:
+                errors[w] += 1
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(w,)) for w in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat_ms = np.concatenate([np.array(l) for l in latencies]) * 1000 if any(latencies) else np.array([])
+    result = {
+        "concurrency": concurrency,
+        "requests": int(lat_ms.size),
+        "errors": int(sum(errors)),
+        "rps": round(lat_ms.size / elapsed, 1)
+    }
+    for p in (50, 95, 99):
+        result[f"p{p}_ms"] = round(float(np.percentile(lat_ms, p)), 3) if lat_ms.size else None
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def run(args):
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenarios: {unknown}")
+    concurrency = [int(c) for c in args.concurrency.split(",")]
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    proc = start_server(db_path)
+    try:
+        ctx = prepare_context()
+        results = {}
+        for name in scenarios:
+            for c in concurrency:
+                key = f"{name}@c{c}"
+                results[key] = run_load(SCENARIOS[name], ctx, c, args.duration)
+                r = results[key]
+                print(f"{key:<24} {r['rps']:>9} req/s  p50 {r['p50_ms']} ms  p95 {r['p95_ms']} ms  p99 {r['p99_ms']} ms  errors {r['errors']}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "duration_s": args.duration
+        },
+        "results": results
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {args.out}")
+
+    if args.baseline:
+        return compare_files(args.baseline, args.out, args.threshold)
+    return 0
+
+
+# Regression = p95/p99 naik atau throughput turun lebih dari threshold (relatif)
+def compare(baseline, current, threshold):
+    rows = []
+    regressions = 0
+    for key in sorted(set(baseline["results"]) & set(current["results"])):
+        b, c = baseline["results"][key], current["results"][key]
+        flags = []
+        for metric in ("p95_ms", "p99_ms"):
+            if b.get(metric) and c.get(metric) and c[metric] > b[metric] * (1 + threshold):
+                flags.append(f"{metric} +{(c[metric] / b[metric] - 1) * 100:.0f}%")
+        if b.get("rps") and c.get("rps") is not None and c["rps"] < b["rps"] * (1 - threshold):
+            flags.append(f"rps -{(1 - c['rps'] / b['rps']) * 100:.0f}%")
+        if c.get("errors", 0) > b.get("errors", 0):
+            flags.append(f"errors {b.get('errors', 0)} -> {c['errors']}")
+        regressions += bool(flags)
+        rows.append((key, b, c, flags))
+
+    for key, b, c, flags in rows:
+        status = "REGRESSION " + ", ".join(flags) if flags else "ok"
+        print(f"{key:<24} rps {b['rps']:>8} -> {c['rps']:<8} p95 {b['p95_ms']} -> {c['p95_ms']}  p99 {b['p99_ms']} -> {c['p99_ms']}  {status}")
+    missing = sorted(set(baseline["results"]) - set(current["results"]))
+    if missing:
+        print(f"Not measured in current run: {', '.join(missing)}")
+    print(f"{regressions} regression(s) at threshold {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def compare_files(baseline_path, current_path, threshold):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    with open(current_path) as f:
+        current = json.load(f)
+    return compare(baseline, current, threshold)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serving benchmark & load test")
+    sub = parser.add_subparsers(dest="command")
+
+    p_run = sub.add_parser("run", help="Start app, run all scenarios, save JSON")
+    p_run.add_argument("--out", default="bench_results.json")
+    p_run.add_argument("--duration", type=float, default=float(os.getenv("BENCH_DURATION", 10)))
+    p_run.add_argument("--concurrency", default=os.getenv("BENCH_CONCURRENCY", "1,8"))
+    p_run.add_argument("--scenarios", default=",".join(SCENARIOS))
+    p_run.add_argument("--baseline", default=None, help="Compare against this baseline after the run")
+    p_run.add_argument("--threshold", type=float, default=0.10)
+
+    p_cmp = sub.add_parser("compare", help="Compare two result files")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+    if args.command is None:
+        args = parser.parse_args(["run"] + sys.argv[1:])
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "compare":
+        sys.exit(compare_files(args.baseline, args.current, args.threshold))
+    sys.exit(run(args))
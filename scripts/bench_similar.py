@@ -0,0 +1,49 @@
+import time
+import sys
+import os
+import tracemalloc
+import numpy as np
+
+sys.path.append(os.getcwd())
+
+from app.services.retrieval import build_product_index, build_item_embedding, build_neighbor_table, ProductIndex
+from bench_retrieval import synthetic_catalog
+
+# Build tabel tetangga (/products/{pid}/similar) vs ukuran katalog: waktu build satu proses,
+# memori puncak (harus ~ block^2, bukan n^2) dan latency lookup per request.
+# Trainer memparalelkan blok baris di process pool (--jobs), jadi waktu build ~ / jumlah core.
+SIZES = [int(s) for s in os.getenv("BENCH_SIZES", "10000,50000,100000").split(",")]
+BLOCK = int(os.getenv("BENCH_BLOCK", 2048))
+K = int(os.getenv("BENCH_K", 20))
+N_QUERIES = int(os.getenv("BENCH_QUERIES", 2000))
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    centroids = rng.normal(0, 1, (4, 8))
+
+    print(f"{'catalog':>10} {'build s':>9} {'peak MB':>9} {'table MB':>9} {'lookup p50 us':>14} {'p99 us':>8}")
+    for n in SIZES:
+        artifact = build_product_index(synthetic_catalog(n, rng), centroids)
+        emb = build_item_embedding(artifact)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        neighbors, scores = build_neighbor_table(emb, K, BLOCK)
+        build_s = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        artifact["neighbors"], artifact["neighbor_scores"] = neighbors, scores
+        index = ProductIndex(artifact)
+        pids = rng.choice(artifact["product_id"], N_QUERIES)
+        lat = []
+        for pid in pids:
+            t = time.perf_counter()
+            index.similar(index.row_of(pid), 10)
+            lat.append(time.perf_counter() - t)
+        us = np.array(lat) * 1e6
+
+        table_mb = (neighbors.nbytes + scores.nbytes) / 2**20
+        print(f"{n:>10} {build_s:>9.2f} {peak / 2**20:>9.1f} {table_mb:>9.1f} "
+              f"{np.percentile(us, 50):>14.2f} {np.percentile(us, 99):>8.2f}")
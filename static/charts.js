@@ -3,7 +3,7 @@ import { state, setMetrics } from './state.js';
 
 export async function loadMetrics() {
     try {
-        const res = await fetch(`${API}/cluster/metrics`);
+        const res = await fetch(`${API}/cluster/metrics?fields=silhouette_score,inertia,feature_readable,centroids_scaled,centroids_real,cluster_counts,elbow_curve,advanced_viz`);
         if(res.ok) {
             const data = await res.json();
             setMetrics(data);